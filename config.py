@@ -15,6 +15,7 @@ P_100_ANALYSIS = True
 OVERT_COVERT_ANALYSIS = False
 
 OVERT_COVERT_REST_CLASSIFICATION = False
+OVERT_COVERT_REST_GROUP_DECODING = False
 ANONYMIZE_AUDIO = False
 
 
@@ -35,6 +36,75 @@ HIGH_FREQ = 170
 T_MIN = -0.2
 T_MAX = 1.5
 
+# Extra seconds kept around the event span when loading only part of a recording
+SELECTIVE_LOAD_MARGIN = 1.0
+
+# ERP components scanned by ERPComponentScanner (windows in seconds)
+OCCIPITAL_CHANNELS = ['PO3', 'POz', 'PO4']
+ERP_COMPONENTS = [
+    {"name": "P100", "tmin": 0.08, "tmax": 0.12, "polarity": "positive", "channels": OCCIPITAL_CHANNELS},
+    {"name": "N100", "tmin": 0.12, "tmax": 0.20, "polarity": "negative", "channels": OCCIPITAL_CHANNELS},
+    {"name": "P200", "tmin": 0.15, "tmax": 0.25, "polarity": "positive", "channels": OCCIPITAL_CHANNELS},
+    {"name": "P300", "tmin": 0.25, "tmax": 0.50, "polarity": "positive", "channels": ['Pz', 'CPz', 'POz']},
+]
+
+# Parallelism
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Cross-validation of the overt/covert/rest decoder; folds run in parallel processes
+# with THREADS_PER_WORKER compute threads each
+CV_FOLDS = 5
+CV_REPEATS = 1
+THREADS_PER_WORKER = max(1, (os.cpu_count() or 1) // MAX_WORKERS)
+
+# Fine-tuning of a decoder initialized from a checkpoint (pooled model or previous session)
+DECODER_FINE_TUNE = {"epochs": 10, "learning_rate": 1e-4, "patience": 3}
+
+# Decoder hyperparameters (OvertCoverRestClassifier architecture and training). time_window
+# crops the epochs to [start, stop) samples on the time axis; None keeps the whole epoch
+DECODER_HYPERPARAMETERS = {
+    "learning_rate": 1e-3,
+    "batch_size": 128,
+    "temporal_filters": 16,
+    "temporal_kernel": 10,
+    "spatial_filters": 32,
+    "pool_size": 4,
+    "dense_units": 128,
+    "dropout": 0.5,
+    "time_window": None
+}
+
+# Hyperparameter sweep: values tried per hyperparameter (any DECODER_HYPERPARAMETERS key),
+# number of sampled trials (None for the full grid), and median pruning of trials whose best
+# validation loss is worse than the median of the completed trials at the same epoch, once
+# DECODER_SWEEP_MIN_TRIALS trials have completed and after DECODER_SWEEP_WARMUP_EPOCHS epochs
+DECODER_SWEEP_SPACE = {
+    "learning_rate": [1e-3, 3e-4],
+    "batch_size": [64, 128],
+    "temporal_kernel": [5, 10, 25],
+    "dropout": [0.25, 0.5]
+}
+DECODER_SWEEP_TRIALS = None
+# Whether the per-session decoding in main.py sweeps first and trains with the best trial
+OVERT_COVERT_REST_SWEEP = False
+DECODER_SWEEP_MIN_TRIALS = 4
+DECODER_SWEEP_WARMUP_EPOCHS = 5
+
+# Minimum fraction of check epochs on which an int8 decoder export must predict the float
+# model's class; exports below it are rejected
+INT8_MIN_AGREEMENT = 0.9
+
+# Real-time decoding: chunk length of replayed streams and time between decisions (seconds)
+REALTIME_CHUNK_DURATION = 0.04
+REALTIME_STEP = 0.1
+
+# Decoder telemetry: repetitions and batch size of the inference latency benchmark
+TELEMETRY_LATENCY_RUNS = 100
+TELEMETRY_LATENCY_BATCH_SIZE = 1
+
+# Memory budget of the process-wide session cache (bytes)
+SESSION_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
 
 
 
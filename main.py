@@ -1,5 +1,6 @@
 from src.dataset.bids import create_bids_dataset
-from src.pipelines.p100_pipeline import P100AnalysisPipeline
+from src.pipelines.p100_group_runner import P100GroupRunner
+from src.analysis.p100_batch import P100BatchEngine
 from src.decoding.overt_covert_rest import SpeechEEGDatasetLoader
 import config as config
 from bids import BIDSLayout
@@ -44,20 +45,22 @@ if __name__== '__main__':
         }
 
         layout = BIDSLayout(config.BIDS_DIR, validate=True)
-        subject_ids = layout.get_subjects()
+        sessions = [
+            (sub, ses)
+            for sub in layout.get_subjects()
+            for ses in layout.get_sessions(subject=sub)
+        ]
 
-        for sub in subject_ids:
-            session_ids = layout.get_sessions(subject=sub)  # or any other subject
-            for ses in session_ids:
-                pipeline = P100AnalysisPipeline(
-                    subject_id=sub,
-                    session_id=ses,
-                    condition1_config=visual,
-                    condition2_config=rest,
-                    channels = ['PO3', 'POz', 'PO4']
-                )
+        runner = P100GroupRunner(
+            sessions=sessions,
+            condition1_config=visual,
+            condition2_config=rest,
+            channels = ['PO3', 'POz', 'PO4']
+        )
+        runner.run()
 
-                pipeline.run(save_csv=True)
+        group_results = P100BatchEngine(channels=['PO3', 'POz', 'PO4']).load_cache().compute()
+        group_results.to_csv(Path('p100_results', 'p100_group_results.csv'), index=False)
 
 
     if config.OVERT_COVERT_REST_CLASSIFICATION:
@@ -73,7 +76,29 @@ if __name__== '__main__':
                 pipeline = OvertCovertRestPipeline(
                     subject_id=sub, session_id=ses
                 )
-                pipeline.run()
+                pipeline.run(sweep=config.OVERT_COVERT_REST_SWEEP)
+
+        from src.decoding.telemetry import summarize_telemetry
+
+        telemetry, telemetry_summary = summarize_telemetry()
+        if telemetry is not None:
+            telemetry.to_csv(Path(config.CURR_DIR, 'DecodingResults', 'cohort_overt_covert_rest_telemetry.csv'), index=False)
+            telemetry_summary.to_csv(
+                Path(config.CURR_DIR, 'DecodingResults', 'cohort_overt_covert_rest_telemetry_summary.csv'), index=False
+            )
+
+
+    if config.OVERT_COVERT_REST_GROUP_DECODING:
+
+        from src.pipelines.group_decoding_pipeline import GroupDecodingPipeline
+
+        layout = BIDSLayout(config.BIDS_DIR, validate=True)
+        sessions = [
+            (sub, ses)
+            for sub in layout.get_subjects()
+            for ses in layout.get_sessions(subject=sub)
+        ]
+        GroupDecodingPipeline(sessions=sessions).run()
 
 
     if config.ANONYMIZE_AUDIO:
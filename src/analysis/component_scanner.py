@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from mne import Evoked
+from numpy.lib.stride_tricks import sliding_window_view
+
+import config as config
+
+
+class ERPComponentScanner:
+    """
+    Computes many named ERP components (window, polarity, channel group) in one pass over
+    evoked or epoched data, generalizing P100ComponentAnalyzer's fixed window and polarity.
+
+    Window means are read from a cumulative sum over time, so the cost of a component does
+    not depend on its window length and sliding-window scans stay cheap.
+
+    Attributes:
+        components (pd.DataFrame): One row per component with name, tmin, tmax, polarity and channels.
+    """
+    def __init__(self, components=None):
+        """
+        Args:
+            components (list or pd.DataFrame or None): Component table, e.g.
+                [{'name': 'P100', 'tmin': 0.08, 'tmax': 0.12, 'polarity': 'positive',
+                  'channels': ['PO3', 'POz', 'PO4']}]. Defaults to config.ERP_COMPONENTS.
+        """
+        components = config.ERP_COMPONENTS if components is None else components
+        self.components = pd.DataFrame(components).reset_index(drop=True)
+        invalid = ~self.components['polarity'].isin(['positive', 'negative'])
+        if invalid.any():
+            raise ValueError("Invalid polarity. Choose from 'positive' or 'negative'.")
+
+    @staticmethod
+    def _window_indices(times, tmin, tmax):
+        """Returns half-open sample ranges [start, stop) of inclusive (tmin, tmax) windows."""
+        start = np.searchsorted(times, np.asarray(tmin), side='left')
+        stop = np.searchsorted(times, np.asarray(tmax), side='right')
+        if np.any(stop <= start):
+            raise ValueError("No data points found within the specified time window.")
+        return start, stop
+
+    def _channel_groups(self, ch_names):
+        """
+        Builds the (n_groups, n_channels) averaging matrix of the distinct channel groups
+        and the group index of every component.
+        """
+        groups = list(dict.fromkeys(tuple(channels) for channels in self.components['channels']))
+        weights = np.zeros((len(groups), len(ch_names)))
+        for g, channels in enumerate(groups):
+            idx = [ch_names.index(ch) for ch in channels if ch in ch_names]
+            if not idx:
+                raise ValueError("None of the selected channels are present in the data.")
+            weights[g, idx] = 1.0 / len(idx)
+        group_idx = np.array([groups.index(tuple(channels)) for channels in self.components['channels']])
+        return weights, group_idx
+
+    def compute(self, data, times, ch_names):
+        """
+        Computes every component for all leading dimensions of `data` at once.
+
+        Args:
+            data (np.ndarray): Array of shape (..., n_channels, n_times), e.g. one evoked
+                response, epochs, or a sessions x conditions stack.
+            times (np.ndarray): Time points in seconds.
+            ch_names (list): Channel names of the channel axis.
+
+        Returns:
+            dict: 'latency', 'peak' and 'mean' arrays of shape (..., n_components), in the units of `data`.
+        """
+        times = np.asarray(times)
+        weights, group_idx = self._channel_groups(list(ch_names))
+        group_data = np.einsum('gc,...ct->...gt', weights, np.asarray(data, dtype=float))
+        comp_data = group_data[..., group_idx, :]
+
+        start, stop = self._window_indices(times, self.components['tmin'], self.components['tmax'])
+
+        cumsum = np.concatenate(
+            [np.zeros(comp_data.shape[:-1] + (1,)), np.cumsum(comp_data, axis=-1)], axis=-1
+        )
+        comp_range = np.arange(len(self.components))
+        mean = (cumsum[..., comp_range, stop] - cumsum[..., comp_range, start]) / (stop - start)
+
+        sign = np.where(self.components['polarity'] == 'positive', 1.0, -1.0)[:, np.newaxis]
+        in_window = (np.arange(len(times)) >= start[:, np.newaxis]) & (np.arange(len(times)) < stop[:, np.newaxis])
+        candidates = np.where(in_window, comp_data * sign, -np.inf)
+        peak_idx = np.argmax(candidates, axis=-1)
+        peak = np.take_along_axis(comp_data, peak_idx[..., np.newaxis], axis=-1)[..., 0]
+
+        return {"latency": times[peak_idx], "peak": peak, "mean": mean}
+
+    def scan_evoked(self, evoked: Evoked) -> pd.DataFrame:
+        """
+        Computes every component of one evoked response.
+
+        Args:
+            evoked (Evoked): Averaged ERP.
+
+        Returns:
+            pd.DataFrame: The component table with latency (s), peak (µV) and mean (µV) columns added.
+        """
+        result = self.compute(evoked.data, evoked.times, evoked.ch_names)
+        df = self.components.copy()
+        df['latency'] = result['latency']
+        df['peak'] = result['peak'] * 1e6  # Convert to µV
+        df['mean'] = result['mean'] * 1e6  # Convert to µV
+        return df
+
+
+def sliding_window_scan(evoked: Evoked, channels, window_length, step=None,
+                        tmin=None, tmax=None, polarity='positive') -> pd.DataFrame:
+    """
+    Mean amplitude, peak amplitude and peak latency of every sliding window over the channel
+    average, using one cumulative sum for the means and one strided view for the peaks.
+
+    Args:
+        evoked (Evoked): Averaged ERP.
+        channels (list): Channels to average.
+        window_length (float): Window length in seconds.
+        step (float or None): Step between window starts in seconds. Defaults to one sample.
+        tmin (float or None): Earliest window start. Defaults to the first time point.
+        tmax (float or None): Latest window end. Defaults to the last time point.
+        polarity (str): 'positive' or 'negative' peak.
+
+    Returns:
+        pd.DataFrame: One row per window with window_start, window_end, latency, peak (µV) and mean (µV).
+    """
+    if polarity not in ('positive', 'negative'):
+        raise ValueError("Invalid polarity. Choose from 'positive' or 'negative'.")
+
+    ch_idx = [evoked.ch_names.index(ch) for ch in channels if ch in evoked.ch_names]
+    if not ch_idx:
+        raise ValueError("None of the selected channels are present in the data.")
+
+    times = evoked.times
+    sfreq = evoked.info['sfreq']
+    first = 0 if tmin is None else np.searchsorted(times, tmin, side='left')
+    last = len(times) if tmax is None else np.searchsorted(times, tmax, side='right')
+    signal = evoked.data[ch_idx].mean(axis=0)[first:last]
+    seg_times = times[first:last]
+
+    n_win = int(round(window_length * sfreq)) + 1
+    hop = 1 if step is None else max(1, int(round(step * sfreq)))
+    if n_win > len(signal):
+        raise ValueError("Window length exceeds the scanned time span.")
+
+    starts = np.arange(0, len(signal) - n_win + 1, hop)
+    cumsum = np.concatenate([[0.0], np.cumsum(signal)])
+    mean = (cumsum[starts + n_win] - cumsum[starts]) / n_win
+
+    windows = sliding_window_view(signal, n_win)[starts]
+    offset = np.argmax(windows if polarity == 'positive' else -windows, axis=1)
+    peak_idx = starts + offset
+
+    return pd.DataFrame({
+        "window_start": seg_times[starts],
+        "window_end": seg_times[starts + n_win - 1],
+        "latency": seg_times[peak_idx],
+        "peak": signal[peak_idx] * 1e6,  # Convert to µV
+        "mean": mean * 1e6               # Convert to µV
+    })
@@ -1,27 +1,38 @@
 import numpy as np
 import mne
 from matplotlib import pyplot as plt
+from scipy.signal import detrend
 
 from src.dataset.data_reader import BIDSDatasetReader
+from src.analysis.streaming_evoked import StreamingEvoked
 from src.utils.graphics import styled_print
+from src.visualizations.group_plot import plot_traces, legend_handles
 import config as config
 
 class SpeechEventExtractor:
+    # (criteria, exclude) per event type
+    EVENT_CRITERIA = {
+        'silence': (['Experiment','Words', 'Start', 'Speech','Audio', 'silence'], []),
+        'overt': (['Real', 'Words', 'Experiment', 'Start', 'Speech', 'Audio'], ['silence']),
+        'covert': (['Silent', 'Words', 'Experiment', 'Start', 'Speech', 'Audio'], ['silence']),
+    }
+
     def __init__(self,raw, tmin=-0.2, tmax=0.8):
         styled_print('', 'Initializing SpeechEventExtractor Class', color='red', panel=True)
         self.raw = raw
         self.annotations = self.raw.annotations
         self.tmin = tmin
         self.tmax = tmax
+        self._evokeds = None
     
     def get_silence_events(self):
-        return self._filter_events(['Experiment','Words', 'Start', 'Speech','Audio', 'silence'])
+        return self._filter_events(*self.EVENT_CRITERIA['silence'])
     
     def get_overt_speaking_events(self):
-        return self._filter_events(['Real', 'Words', 'Experiment', 'Start', 'Speech', 'Audio'], exclude=['silence'])
+        return self._filter_events(*self.EVENT_CRITERIA['overt'])
     
     def get_covert_speaking_events(self):
-        return self._filter_events(['Silent', 'Words', 'Experiment', 'Start', 'Speech', 'Audio'], exclude=['silence'])
+        return self._filter_events(*self.EVENT_CRITERIA['covert'])
     
     def _filter_events(self, criteria, exclude=None):
         exclude = exclude or []
@@ -62,6 +73,63 @@ class SpeechEventExtractor:
                             baseline=(None, 0), detrend=1, preload=True)
         return epochs
     
+    def _classify_events(self):
+        """
+        Sorts the annotations into silence, overt and covert onsets (in samples) in one scan.
+        """
+        sfreq = self.raw.info['sfreq']
+        onsets = {event_type: [] for event_type in self.EVENT_CRITERIA}
+        for event in self.annotations:
+            description = event['description']
+            for event_type, (criteria, exclude) in self.EVENT_CRITERIA.items():
+                if all(criterion in description for criterion in criteria) \
+                        and all(excl not in description for excl in exclude):
+                    onsets[event_type].append(int(event['onset'] * sfreq))
+        return {event_type: np.array(samples, dtype=int) for event_type, samples in onsets.items()}
+
+    def compute_evokeds(self, batch_size=64):
+        """
+        Computes the silence, overt and covert evoked responses in a single pass over the
+        annotations and the data, without building Epochs. Each epoch is linearly detrended and
+        baseline-corrected to (None, 0), as in `create_epochs`, and accumulated with Welford
+        updates. The result is cached on the extractor.
+
+        Args:
+            batch_size (int): Number of epochs held in memory at once.
+
+        Returns:
+            dict: event type -> StreamingEvoked (mean, sem and n over the EEG channels).
+        """
+        if self._evokeds is not None:
+            return self._evokeds
+
+        sfreq = self.raw.info['sfreq']
+        start_offset = int(round(self.tmin * sfreq))
+        n_times = int(round(self.tmax * sfreq)) - start_offset + 1
+        times = (start_offset + np.arange(n_times)) / sfreq
+        baseline_mask = times <= 0
+        # Same channels as create_epochs(...).average(): every EEG channel, including those marked bad
+        picks = mne.pick_types(self.raw.info, eeg=True, exclude=[])
+        ch_names = [self.raw.ch_names[i] for i in picks]
+
+        evokeds = {}
+        for event_type, samples in self._classify_events().items():
+            starts = samples - self.raw.first_samp + start_offset
+            starts = starts[(starts >= 0) & (starts + n_times <= self.raw.n_times)]
+            stream = StreamingEvoked(times=times, ch_names=ch_names)
+            for batch_start in range(0, len(starts), batch_size):
+                batch = np.stack([
+                    self.raw.get_data(picks=picks, start=start, stop=start + n_times)
+                    for start in starts[batch_start:batch_start + batch_size]
+                ])
+                batch = detrend(batch, axis=-1, type='linear')
+                batch -= batch[:, :, baseline_mask].mean(axis=2, keepdims=True)
+                stream.update(batch)
+            evokeds[event_type] = stream
+
+        self._evokeds = evokeds
+        return evokeds
+
     def plot_erp(self):
         event_types = ['silence', 'overt', 'covert']
         colors = {'silence': 'blue', 'overt': 'green', 'covert': 'red'}
@@ -73,27 +141,26 @@ class SpeechEventExtractor:
             ax.spines['top'].set_visible(False)
             ax.spines['right'].set_visible(False)
         
+        traces = {0: [], 1: [], 2: []}
+        trace_colors = []
+        evokeds = self.compute_evokeds()
         for event_type in event_types:
-            epochs = self.create_epochs(event_type)
-            evoked = epochs.average()
+            evoked = evokeds[event_type]
+            times = evoked.times
             
-            # Plot F3
-            ch_idx_f3 = epochs.ch_names.index('F3')
-            axes[0].plot(evoked.times, evoked.data[ch_idx_f3], label=f'{event_type} - F3', color=colors[event_type])
-            
-            # Plot F7
-            ch_idx_f7 = epochs.ch_names.index('F7')
-            axes[1].plot(evoked.times, evoked.data[ch_idx_f7], label=f'{event_type} - F7', color=colors[event_type])
-            
-            # Plot all channels (mean across all)
-            axes[2].plot(evoked.times, evoked.data.mean(axis=0), label=f'{event_type} - All', color=colors[event_type])
-        
-        
+            traces[0].append(evoked.mean[evoked.ch_names.index('F3')])  # F3
+            traces[1].append(evoked.mean[evoked.ch_names.index('F7')])  # F7
+            traces[2].append(evoked.mean.mean(axis=0))  # mean across all channels
+            trace_colors.append(colors[event_type])
         
-        for ax in axes:
+        suffixes = ['F3', 'F7', 'All']
+        for i, ax in enumerate(axes):
+            plot_traces(ax, times, np.array(traces[i]), colors=trace_colors)
             ax.set_xlabel('Time (s)')
             ax.set_ylabel('Amplitude')
-            ax.legend()
+            ax.legend(handles=legend_handles(
+                {f'{event_type} - {suffixes[i]}': colors[event_type] for event_type in event_types}
+            ))
         
         plt.tight_layout()
         plt.show()
@@ -124,21 +191,22 @@ def plot_erp_all_subjects_sessions(subjects_data):
         ax.spines['top'].set_visible(False)
         ax.spines['right'].set_visible(False)
     
+    traces = {0: [], 1: [], 2: []}
+    trace_colors = []
     for (subject_id, session_id), extractor in subjects_data.items():
+        evokeds = extractor.compute_evokeds()  # one pass per session, cached
         for event_type in event_types:
-            epochs = extractor.create_epochs(event_type)
-            evoked = epochs.average()
-            
-            # Plot F3
-            ch_idx_f3 = epochs.ch_names.index('F3')
-            axes[0].plot(evoked.times, evoked.data[ch_idx_f3], label=f'S{subject_id} Sess{session_id} {event_type}', color=colors[event_type], alpha=0.5)
+            evoked = evokeds[event_type]
+            times = evoked.times
             
-            # Plot F7
-            ch_idx_f7 = epochs.ch_names.index('F7')
-            axes[1].plot(evoked.times, evoked.data[ch_idx_f7], label=f'S{subject_id} Sess{session_id} {event_type}', color=colors[event_type], alpha=0.5)
-            
-            # Plot all channels (mean across all)
-            axes[2].plot(evoked.times, evoked.data.mean(axis=0), label=f'S{subject_id} Sess{session_id} {event_type}', color=colors[event_type], alpha=0.5)
+            traces[0].append(evoked.mean[evoked.ch_names.index('F3')])  # F3
+            traces[1].append(evoked.mean[evoked.ch_names.index('F7')])  # F7
+            traces[2].append(evoked.mean.mean(axis=0))  # mean across all channels
+            trace_colors.append(colors[event_type])
+    
+    # One LineCollection per axis instead of one line per subject, session and condition
+    for i, ax in enumerate(axes):
+        plot_traces(ax, times, np.array(traces[i]), colors=trace_colors, alpha=0.5)
     
     axes[0].set_title('ERP Comparison for F3')
     axes[1].set_title('ERP Comparison for F7')
@@ -147,7 +215,7 @@ def plot_erp_all_subjects_sessions(subjects_data):
     for ax in axes:
         ax.set_xlabel('Time (s)')
         ax.set_ylabel('Amplitude')
-        ax.legend(loc='upper right', fontsize='small', ncol=2)
+        ax.legend(handles=legend_handles(colors, alpha=0.5), loc='upper right', fontsize='small')
     
     plt.tight_layout()
     plt.show()
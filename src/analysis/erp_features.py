@@ -0,0 +1,57 @@
+import numpy as np
+
+
+def window_masks(times, windows):
+    """
+    Builds boolean masks selecting the samples of each time window.
+
+    Args:
+        times (np.ndarray): Time points in seconds, shape (n_times,).
+        windows (list): List of (tmin, tmax) tuples in seconds (inclusive).
+
+    Returns:
+        np.ndarray: Boolean array of shape (n_windows, n_times).
+
+    Raises:
+        ValueError: If a window contains no data points.
+    """
+    times = np.asarray(times)
+    bounds = np.asarray(windows, dtype=float).reshape(-1, 2)
+    masks = (times >= bounds[:, :1]) & (times <= bounds[:, 1:])
+    if not masks.any(axis=1).all():
+        raise ValueError("No data points found within the specified time window.")
+    return masks
+
+
+def window_features(data, times, windows, polarity='positive'):
+    """
+    Computes peak latency, peak amplitude and mean amplitude for every window at once.
+    All leading dimensions of `data` (sessions, conditions, epochs, ...) are processed together.
+
+    Args:
+        data (np.ndarray): Array of shape (..., n_times). NaN rows yield NaN features.
+        times (np.ndarray): Time points in seconds, shape (n_times,).
+        windows (list): List of (tmin, tmax) tuples in seconds.
+        polarity (str): 'positive' to take the maximum, 'negative' to take the minimum.
+
+    Returns:
+        tuple: (latency, peak, mean) arrays of shape (..., n_windows), in the units of `data`.
+    """
+    if polarity not in ('positive', 'negative'):
+        raise ValueError("Invalid polarity. Choose from 'positive' or 'negative'.")
+
+    data = np.asarray(data, dtype=float)
+    times = np.asarray(times)
+    masks = window_masks(times, windows)
+
+    signed = data if polarity == 'positive' else -data
+    candidates = np.where(masks, signed[..., np.newaxis, :], -np.inf)
+    candidates = np.nan_to_num(candidates, nan=-np.inf)
+    peak_idx = np.argmax(candidates, axis=-1)
+
+    peak = np.take_along_axis(data[..., np.newaxis, :], peak_idx[..., np.newaxis], axis=-1)[..., 0]
+    latency = times[peak_idx].astype(float)
+    latency[np.isnan(peak)] = np.nan
+    mean = (data @ masks.T) / masks.sum(axis=1)
+
+    return latency, peak, mean
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import mne
+
+from src.analysis.erp_features import window_features
+from src.utils.graphics import styled_print
+import config as config
+
+
+EVOKED_CACHE_DIR = Path(config.BIDS_DIR) / "derivatives" / "evoked"
+
+
+def evoked_cache_path(sub_id, ses_id, condition, directory=None):
+    """Returns the cached evoked file of a session and condition."""
+    directory = EVOKED_CACHE_DIR if directory is None else Path(directory)
+    return directory / f"sub-{sub_id}_ses-{ses_id}_{condition}-ave.fif"
+
+
+class P100BatchEngine:
+    """
+    Computes P100 metrics for a whole cohort at once from a
+    sessions x conditions x channels x times evoked array.
+
+    Attributes:
+        channels (list): Channels averaged before peak detection.
+        windows (dict): Named (tmin, tmax) windows in seconds.
+        evokeds (dict): Evoked responses keyed by (subject_id, session_id, condition).
+    """
+    def __init__(self, channels, windows=None, baseline_window=None):
+        """
+        Args:
+            channels (list): Channel names to average, e.g. ['PO3', 'POz', 'PO4'].
+            windows (dict or None): Named time windows. Defaults to {'P100': (0.08, 0.12)}.
+            baseline_window (tuple or None): Optional window subtracted from the channel average,
+                as in P100ComponentAnalyzer.get_p100_peak.
+        """
+        self.channels = channels
+        self.windows = windows or {'P100': (0.08, 0.12)}
+        self.baseline_window = baseline_window
+        self.evokeds = {}
+
+    def add(self, subject_id, session_id, condition, evoked):
+        """
+        Registers the evoked response of one session and condition.
+
+        Returns:
+            P100BatchEngine: self
+        """
+        self.evokeds[(subject_id, session_id, condition)] = evoked
+        return self
+
+    def load_cache(self, directory=None):
+        """
+        Registers every cached evoked file written by P100AnalysisPipeline.save_evokeds.
+
+        Args:
+            directory (str or Path or None): Cache directory. Defaults to derivatives/evoked.
+
+        Returns:
+            P100BatchEngine: self
+        """
+        directory = EVOKED_CACHE_DIR if directory is None else Path(directory)
+        for filepath in sorted(directory.glob("sub-*_ses-*_*-ave.fif")):
+            sub_part, ses_part, condition = filepath.name[:-len("-ave.fif")].split("_", 2)
+            evoked = mne.read_evokeds(filepath, condition=0, verbose=False)
+            self.add(sub_part[len("sub-"):], ses_part[len("ses-"):], condition, evoked)
+        styled_print('', f'Loaded {len(self.evokeds)} cached evoked responses', color='green')
+        return self
+
+    def stack(self):
+        """
+        Stacks the registered evoked data, averaged over `channels`.
+
+        Returns:
+            tuple: (data of shape (n_sessions, n_conditions, n_channels, n_times), sessions, conditions, times).
+                Missing session/condition combinations are NaN.
+
+        Raises:
+            ValueError: If no evoked data is registered or the time axes differ.
+        """
+        if not self.evokeds:
+            raise ValueError("No evoked data registered.")
+
+        sessions = sorted({(sub, ses) for sub, ses, _ in self.evokeds})
+        conditions = list(dict.fromkeys(cond for _, _, cond in self.evokeds))
+        times = next(iter(self.evokeds.values())).times
+
+        data = np.full((len(sessions), len(conditions), len(self.channels), len(times)), np.nan)
+        for (sub, ses, cond), evoked in self.evokeds.items():
+            if len(evoked.times) != len(times) or not np.allclose(evoked.times, times):
+                raise ValueError(f"Time axis of sub-{sub} ses-{ses} {cond} differs from the cohort.")
+            valid = [ch for ch in self.channels if ch in evoked.ch_names]
+            if not valid:
+                raise ValueError("None of the selected channels are present in the data.")
+            ch_idx = [evoked.ch_names.index(ch) for ch in valid]
+            data[sessions.index((sub, ses)), conditions.index(cond), :len(valid)] = evoked.data[ch_idx]
+
+        return data, sessions, conditions, times
+
+    def compute(self):
+        """
+        Computes peak latency, peak amplitude and mean amplitude for every session,
+        condition and window in one vectorized call.
+
+        Returns:
+            pd.DataFrame: One row per subject, session, condition and window, with latency in
+                seconds and peak/mean in µV.
+        """
+        data, sessions, conditions, times = self.stack()
+        with np.errstate(invalid='ignore'):
+            avg_data = np.nansum(data, axis=2) / (~np.isnan(data)).sum(axis=2)
+
+        if self.baseline_window:
+            baseline_mask = (times >= self.baseline_window[0]) & (times <= self.baseline_window[1])
+            if not np.any(baseline_mask):
+                raise ValueError("No data points found in the baseline window.")
+            avg_data = avg_data - avg_data[..., baseline_mask].mean(axis=-1, keepdims=True)
+
+        names = list(self.windows)
+        latency, peak, mean = window_features(avg_data, times, [self.windows[name] for name in names])
+
+        sub_idx, cond_idx, win_idx = np.indices(latency.shape).reshape(3, -1)
+        df = pd.DataFrame({
+            "subject_id": [sessions[i][0] for i in sub_idx],
+            "session_id": [sessions[i][1] for i in sub_idx],
+            "condition": [conditions[i] for i in cond_idx],
+            "window": [names[i] for i in win_idx],
+            "latency": latency.ravel(),
+            "peak": peak.ravel() * 1e6,   # Convert to µV
+            "mean": mean.ravel() * 1e6    # Convert to µV
+        })
+        return df.dropna(subset=["peak"]).reset_index(drop=True)
@@ -3,14 +3,15 @@ from mne import Evoked
 from mne.epochs import Epochs
 
 class P100ComponentAnalyzer:
-    def __init__(self, epochs: Epochs, channels, time_window=(0.08, 0.12)):
+    def __init__(self, epochs: Epochs, channels, time_window=(0.08, 0.12), evoked: Evoked = None):
         """
         Initialize the P100 analyzer.
 
         Args:
-            epochs (Epochs): Preprocessed MNE Epochs object.
+            epochs (Epochs): Preprocessed MNE Epochs object. May be None when `evoked` is given.
             time_window (tuple): Time window (in seconds) to look for P100 peak.
             channels (list or None): List of channel names to average. If None, uses default P100-relevant channels.
+            evoked (Evoked or None): Precomputed evoked response (e.g. from StreamingEvoked); skips averaging the epochs.
         """
         self.epochs = epochs
         self.time_window = time_window
@@ -18,13 +19,17 @@ class P100ComponentAnalyzer:
 
         self.channels = channels
 
-        valid_chs = [ch for ch in self.channels if ch in self.epochs.ch_names]
+        source = evoked if evoked is not None else self.epochs
+        valid_chs = [ch for ch in self.channels if ch in source.ch_names]
         if not valid_chs:
             raise ValueError("None of the selected channels are present in the Epochs object.")
 
         self.channels = valid_chs
-        picked_epochs = self.epochs.copy().pick_channels(self.channels)
-        self.evoked = picked_epochs.average()
+        if evoked is not None:
+            self.evoked = evoked.copy().pick(self.channels)
+        else:
+            picked_epochs = self.epochs.copy().pick_channels(self.channels)
+            self.evoked = picked_epochs.average()
 
     def get_evoked(self) -> Evoked:
         """
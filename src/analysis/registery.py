@@ -27,6 +27,9 @@ from pathlib import Path
 from src.dataset.data_reader import BIDSDatasetReader
 from src.dataset.data_loader import DataLoader
 from src.utils.graphics import styled_print
+from src.utils.parallel import run_per_session, report_errors
+from src.visualizations.render_service import render_figure
+from src.visualizations.occipital_plotter import draw_occipital_grid
 import config
 
 
@@ -63,26 +66,26 @@ class EEGEpochExtractor:
     def create_epochs(
             self, trial_mode, trial_unit, experiment_mode, 
             trial_boundary, trial_type, modality,  
-            tmin=None, tmax=None,):
+            tmin=None, tmax=None, max_workers=None):
         """
         Creates epochs for all subjects/sessions for a given trial type.
+        Sessions are epoched concurrently with at most `max_workers` threads.
         """
         tmin = self.tmin if tmin is None else tmin
         tmax = self.tmax if tmax is None else tmax
-        epochs = {}
-        
-        for (sub_id, ses_id), raw in self.raw_data.items():
+
+        def _epoch_session(key, raw):
+            sub_id, ses_id = key
             styled_print('', f'Creating epochs: sub-{sub_id}, ses-{ses_id}', color='green')
-            try:
-                loader = DataLoader(
-                    eeg_data=raw, trial_mode=trial_mode, trial_type=trial_type,
-                    trial_unit=trial_unit, experiment_mode=experiment_mode,
-                    trial_boundary=trial_boundary, modality=modality
-                )
-                epochs[(sub_id, ses_id)] = loader.create_epochs(tmin=tmin, tmax=tmax)
-            except Exception as e:
-                styled_print('', f'Skipping sub-{sub_id}, ses-{ses_id} due to: {e}', color='yellow')
+            loader = DataLoader(
+                eeg_data=raw, trial_mode=trial_mode, trial_type=trial_type,
+                trial_unit=trial_unit, experiment_mode=experiment_mode,
+                trial_boundary=trial_boundary, modality=modality
+            )
+            return loader.create_epochs(tmin=tmin, tmax=tmax)
 
+        epochs, errors = run_per_session(_epoch_session, self.raw_data, max_workers=max_workers)
+        report_errors(errors)
         return epochs
 
 
@@ -144,42 +147,42 @@ class VisualRestExtractor:
     def create_epochs_for_all(self,
                                trial_mode, trial_unit, experiment_mode,
                                trial_boundary, trial_type, modality,
-                               tmin=None, tmax=None):
+                               tmin=None, tmax=None, max_workers=None):
         tmin = self.tmin if tmin is None else tmin
         tmax = self.tmax if tmax is None else tmax
-        epochs = {}
 
-        for (sub_id, ses_id), raw in self.raw_data.items():
+        def _epoch_session(key, raw):
+            sub_id, ses_id = key
             styled_print('', f'Creating epochs for sub-{sub_id}, ses-{ses_id}', color='green')
-            try:
-                loader = DataLoader(
-                    eeg_data=raw,
-                    trial_mode=trial_mode,
-                    trial_unit=trial_unit,
-                    experiment_mode=experiment_mode,
-                    trial_boundary=trial_boundary,
-                    trial_type=trial_type,
-                    modality=modality
-                )
-                epochs[(sub_id, ses_id)] = loader.create_epochs(tmin=tmin, tmax=tmax)
-            except Exception as e:
-                styled_print('', f'Skipping sub-{sub_id}, ses-{ses_id} due to error: {e}', color='yellow')
+            loader = DataLoader(
+                eeg_data=raw,
+                trial_mode=trial_mode,
+                trial_unit=trial_unit,
+                experiment_mode=experiment_mode,
+                trial_boundary=trial_boundary,
+                trial_type=trial_type,
+                modality=modality
+            )
+            return loader.create_epochs(tmin=tmin, tmax=tmax)
 
+        epochs, errors = run_per_session(_epoch_session, self.raw_data, max_workers=max_workers)
+        report_errors(errors)
         return epochs
 
     def plot_occipital_all_subjects(self,
                                     trial_mode='Silent', trial_unit='Words',
                                     experiment_mode='Experiment', trial_boundary='Start',
-                                    trial_type='Stimulus', modality='Pictures'):
+                                    trial_type='Stimulus', modality='Pictures',
+                                    max_workers=None, renderer=None):
         pict_epochs = self.create_epochs_for_all(
             trial_mode, trial_unit, experiment_mode,
             trial_boundary, trial_type, modality,
-            tmin=-0.2, tmax=0.5
+            tmin=-0.2, tmax=0.5, max_workers=max_workers
         )
         fix_epochs = self.create_epochs_for_all(
             trial_mode, trial_unit, experiment_mode,
             trial_boundary, 'Fixation', modality,
-            tmin=0.3, tmax=1.0
+            tmin=0.3, tmax=1.0, max_workers=max_workers
         )
 
         if not pict_epochs or not fix_epochs:
@@ -191,9 +194,8 @@ class VisualRestExtractor:
         cols = 4
         rows = int(np.ceil(total_subjects / cols))
 
-        fig, axes = plt.subplots(rows, cols, figsize=(4*cols, 3*rows), sharex=True, sharey=True)
-        axes = axes.flatten()
-
+        positions, titles, pict_means, fix_means = [], [], [], []
+        times = None
         for idx, ((sub_id, ses_id), pict_epo) in enumerate(pict_epochs.items()):
             fix_epo = fix_epochs.get((sub_id, ses_id))
             if fix_epo is None:
@@ -206,33 +208,24 @@ class VisualRestExtractor:
                 styled_print('', f'Skipping plotting for {sub_id}, {ses_id}: {e}', color='yellow')
                 continue
 
-            mean_pict = ev_pict.data.mean(axis=0)
-            mean_fix = ev_fix.data.mean(axis=0)
+            positions.append(idx)
+            titles.append(f"sub-{sub_id}_ses-{ses_id}")
+            pict_means.append(ev_pict.data.mean(axis=0))
+            fix_means.append(ev_fix.data.mean(axis=0))
             times = ev_pict.times
 
-            ax = axes[idx]
-            ax.plot(times, mean_pict, label='Pictorial', color='green')
-            ax.plot(times, mean_fix, label='Fixation', color='blue')
-            ax.axvline(0, linestyle='--', color='cyan', label='Onset')
-            ax.axvline(0.1, linestyle='--', color='red', label='100ms')
-            ax.axvline(0.3, linestyle='--', color='black', label='300ms')
-
-            ax.set_title(f"sub-{sub_id}_ses-{ses_id}")
-            if idx % cols == 0:
-                ax.set_ylabel('Amplitude (µV)')
-            if idx >= (rows - 1) * cols:
-                ax.set_xlabel('Time (s)')
-
-        for ax in axes[total_subjects:]:
-            ax.axis('off')
-
-        axes[0].legend(loc='upper right')
-        plt.tight_layout()
+        spec = {'rows': rows, 'cols': cols, 'n_panels': total_subjects, 'titles': titles}
+        arrays = {
+            'times': times, 'positions': np.array(positions),
+            'pict': np.array(pict_means), 'fix': np.array(fix_means)
+        }
 
         out_dir = Path(config.IMAGES_DIR) / f"{trial_mode}_{trial_unit}_{experiment_mode}_{trial_boundary}_{trial_type}"
-        out_dir.mkdir(parents=True, exist_ok=True)
         save_path = out_dir / 'occipital_evoked.png'
-        fig.savefig(save_path, dpi=600)
+        figsize = (4*cols, 3*rows)
+        if renderer is not None:
+            return renderer.submit(draw_occipital_grid, spec, arrays, save_path, dpi=600, figsize=figsize)
+        render_figure(draw_occipital_grid, spec, arrays, save_path, dpi=600, figsize=figsize)
         styled_print('', f'Saved plot to {save_path}', color='green')
 
 
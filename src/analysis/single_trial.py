@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from mne.epochs import Epochs
+
+from src.analysis.erp_features import window_features
+from src.utils.graphics import styled_print
+import config as config
+
+
+SINGLE_TRIAL_DIR = Path(config.BIDS_DIR) / "derivatives" / "single_trial"
+
+
+class SingleTrialFeatureExtractor:
+    """
+    Computes peak latency, peak amplitude and window mean for every epoch,
+    channel group and window in one vectorized pass.
+
+    Attributes:
+        channel_groups (dict): Named lists of channels averaged per epoch.
+        windows (dict): Named (tmin, tmax) windows in seconds.
+        polarity (str): 'positive' or 'negative' peak.
+    """
+    def __init__(self, channel_groups, windows=None, polarity='positive'):
+        """
+        Args:
+            channel_groups (dict): e.g. {'occipital': ['PO3', 'POz', 'PO4']}.
+            windows (dict or None): Named time windows. Defaults to {'P100': (0.08, 0.12)}.
+            polarity (str): 'positive' to take the maximum, 'negative' to take the minimum.
+        """
+        self.channel_groups = channel_groups
+        self.windows = windows or {'P100': (0.08, 0.12)}
+        self.polarity = polarity
+
+    def _group_weights(self, ch_names):
+        """
+        Builds a (n_groups, n_channels) averaging matrix, ignoring channels missing from the data.
+        """
+        weights = np.zeros((len(self.channel_groups), len(ch_names)))
+        for g, channels in enumerate(self.channel_groups.values()):
+            idx = [ch_names.index(ch) for ch in channels if ch in ch_names]
+            if not idx:
+                raise ValueError("None of the selected channels are present in the Epochs object.")
+            weights[g, idx] = 1.0 / len(idx)
+        return weights
+
+    def extract(self, epochs: Epochs, subject_id, session_id, condition):
+        """
+        Extracts single-trial features from an Epochs object.
+
+        Args:
+            epochs (Epochs): Baseline-corrected MNE Epochs.
+            subject_id (str): BIDS subject identifier.
+            session_id (str): BIDS session identifier.
+            condition (str): Condition label.
+
+        Returns:
+            pd.DataFrame: One row per event, channel group and window, with latency in seconds
+                and peak/mean in µV.
+        """
+        data = epochs.get_data()
+        group_data = np.einsum('gc,ect->egt', self._group_weights(epochs.ch_names), data)
+
+        names = list(self.windows)
+        latency, peak, mean = window_features(
+            group_data, epochs.times, [self.windows[name] for name in names], polarity=self.polarity
+        )
+
+        id_to_description = {v: k for k, v in epochs.event_id.items()}
+        descriptions = np.array([id_to_description[i] for i in epochs.events[:, 2]], dtype=object)
+        onsets = epochs.events[:, 0] / epochs.info['sfreq']
+        groups = list(self.channel_groups)
+
+        ev_idx, grp_idx, win_idx = np.indices(latency.shape).reshape(3, -1)
+        return pd.DataFrame({
+            "subject_id": subject_id,
+            "session_id": session_id,
+            "condition": condition,
+            "event": epochs.selection[ev_idx],
+            "description": descriptions[ev_idx],
+            "onset": onsets[ev_idx],
+            "channel_group": np.array(groups, dtype=object)[grp_idx],
+            "window": np.array(names, dtype=object)[win_idx],
+            "latency": latency.ravel(),
+            "peak": peak.ravel() * 1e6,   # Convert to µV
+            "mean": mean.ravel() * 1e6    # Convert to µV
+        })
+
+    @staticmethod
+    def save(df, subject_id, session_id, condition, output_dir=None):
+        """
+        Writes a session's features to a Parquet file in the single-trial store.
+
+        Returns:
+            Path: Path of the written file.
+        """
+        output_dir = SINGLE_TRIAL_DIR if output_dir is None else Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        filepath = output_dir / f"sub-{subject_id}_ses-{session_id}_{condition}.parquet"
+        df.to_parquet(filepath, index=False)
+        styled_print('', f'Single-trial features saved to {filepath}', color='green')
+        return filepath
+
+
+def load_single_trial_features(input_dir=None, **filters):
+    """
+    Reads the single-trial store as one table.
+
+    Args:
+        input_dir (str or Path or None): Store directory. Defaults to derivatives/single_trial.
+        **filters: Optional column equality filters, e.g. condition='Visual'.
+
+    Returns:
+        pd.DataFrame: Features of all stored subjects, sessions and conditions.
+    """
+    input_dir = SINGLE_TRIAL_DIR if input_dir is None else Path(input_dir)
+    pq_filters = [(column, '==', value) for column, value in filters.items()] or None
+    return pd.read_parquet(input_dir, filters=pq_filters)
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.parallel import run_per_session, report_errors
+
+
+def permutation_test(x, y, n_permutations=5000, random_state=42):
+    """
+    Two-sided permutation test on the difference of means, with all
+    trial-label permutations evaluated as one matrix product.
+
+    Args:
+        x (array-like): Trial values of condition 1, shape (n1,).
+        y (array-like): Trial values of condition 2, shape (n2,).
+        n_permutations (int): Number of random label permutations.
+        random_state (int or None): Seed of the permutation generator.
+
+    Returns:
+        tuple: (observed difference mean(x) - mean(y), p-value)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Both conditions need at least one trial.")
+
+    pooled = np.concatenate([x, y])
+    observed = x.mean() - y.mean()
+
+    rng = np.random.default_rng(random_state)
+    in_x = rng.random((n_permutations, n1 + n2)).argsort(axis=1) < n1
+    sum_x = in_x.astype(float) @ pooled
+    null = sum_x / n1 - (pooled.sum() - sum_x) / n2
+
+    p_value = (1 + np.sum(np.abs(null) >= abs(observed))) / (n_permutations + 1)
+    return observed, p_value
+
+
+def bootstrap_ci(x, y, n_bootstrap=5000, ci=0.95, random_state=42):
+    """
+    Percentile bootstrap confidence interval of mean(x) - mean(y), resampling
+    trials within each condition with one fancy-indexing call per condition.
+
+    Args:
+        x (array-like): Trial values of condition 1.
+        y (array-like): Trial values of condition 2.
+        n_bootstrap (int): Number of bootstrap resamples.
+        ci (float): Confidence level.
+        random_state (int or None): Seed of the resampling generator.
+
+    Returns:
+        tuple: (ci_low, ci_high)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    rng = np.random.default_rng(random_state)
+    boot = (x[rng.integers(0, len(x), (n_bootstrap, len(x)))].mean(axis=1)
+            - y[rng.integers(0, len(y), (n_bootstrap, len(y)))].mean(axis=1))
+    alpha = (1 - ci) / 2
+    low, high = np.quantile(boot, [alpha, 1 - alpha])
+    return low, high
+
+
+def sign_flip_test(d, n_permutations=5000, random_state=42):
+    """
+    Two-sided one-sample sign-flip permutation test of mean(d) != 0, used at the group level
+    on per-session differences.
+
+    Returns:
+        tuple: (observed mean difference, p-value)
+    """
+    d = np.asarray(d, dtype=float)
+    rng = np.random.default_rng(random_state)
+    signs = rng.choice([-1.0, 1.0], size=(n_permutations, len(d)))
+    null = signs @ d / len(d)
+    observed = d.mean()
+    p_value = (1 + np.sum(np.abs(null) >= abs(observed))) / (n_permutations + 1)
+    return observed, p_value
+
+
+class _SessionContrast:
+    """Picklable per-session test, so sessions can also run in process workers."""
+    def __init__(self, n_permutations=5000, n_bootstrap=5000, ci=0.95, random_state=42):
+        self.n_permutations = n_permutations
+        self.n_bootstrap = n_bootstrap
+        self.ci = ci
+        self.random_state = random_state
+
+    def __call__(self, key, values):
+        x, y = values
+        diff, p_value = permutation_test(
+            x, y, n_permutations=self.n_permutations, random_state=self.random_state
+        )
+        ci_low, ci_high = bootstrap_ci(
+            x, y, n_bootstrap=self.n_bootstrap, ci=self.ci, random_state=self.random_state
+        )
+        return {
+            "n1": len(x), "n2": len(y),
+            "mean1": np.mean(x), "mean2": np.mean(y),
+            "difference": diff, "p_value": p_value,
+            "ci_low": ci_low, "ci_high": ci_high
+        }
+
+
+def contrast_statistics(
+        features, condition1, condition2, metric='mean',
+        n_permutations=5000, n_bootstrap=5000, ci=0.95,
+        random_state=42, max_workers=None, backend='thread'):
+    """
+    Permutation p-values and bootstrap confidence intervals of a condition contrast,
+    per session (trial-level) and for the group (session-level).
+
+    Args:
+        features (pd.DataFrame): Single-trial features, e.g. from load_single_trial_features.
+            Needs subject_id, session_id, condition and `metric` columns; any channel_group
+            and window columns are tested separately.
+        condition1 (str): Label of the first condition, e.g. 'Visual'.
+        condition2 (str): Label of the second condition, e.g. 'Rest'.
+        metric (str): Feature column to compare ('mean', 'peak' or 'latency').
+        n_permutations (int): Number of label permutations.
+        n_bootstrap (int): Number of bootstrap resamples.
+        ci (float): Confidence level.
+        random_state (int or None): Seed for all generators.
+        max_workers (int or None): Worker bound for session-level parallelism.
+        backend (str): 'thread' or 'process'.
+
+    Returns:
+        pd.DataFrame: One row per session plus one 'group' row per channel group and window.
+    """
+    split_cols = [col for col in ('channel_group', 'window') if col in features.columns]
+    tasks = {}
+    for key, df in features.groupby(['subject_id', 'session_id'] + split_cols, sort=True):
+        x = df.loc[df['condition'] == condition1, metric].dropna().to_numpy()
+        y = df.loc[df['condition'] == condition2, metric].dropna().to_numpy()
+        if len(x) and len(y):
+            tasks[key] = (x, y)
+
+    worker = _SessionContrast(
+        n_permutations=n_permutations, n_bootstrap=n_bootstrap, ci=ci, random_state=random_state
+    )
+    results, errors = run_per_session(worker, tasks, max_workers=max_workers, backend=backend)
+    report_errors({key[:2]: e for key, e in errors.items()})
+
+    rows = [dict(zip(['subject_id', 'session_id'] + split_cols, key), **res) for key, res in results.items()]
+    sessions = pd.DataFrame(rows)
+    if sessions.empty:
+        return sessions
+
+    group_rows = []
+    for key, df in sessions.groupby(split_cols, sort=True) if split_cols else [((), sessions)]:
+        key = key if isinstance(key, tuple) else (key,)
+        d = df['difference'].to_numpy()
+        diff, p_value = sign_flip_test(d, n_permutations=n_permutations, random_state=random_state)
+        rng = np.random.default_rng(random_state)
+        boot = d[rng.integers(0, len(d), (n_bootstrap, len(d)))].mean(axis=1)
+        alpha = (1 - ci) / 2
+        ci_low, ci_high = np.quantile(boot, [alpha, 1 - alpha])
+        group_rows.append(dict(
+            zip(split_cols, key), subject_id='group', session_id='group',
+            n1=df['n1'].sum(), n2=df['n2'].sum(),
+            mean1=df['mean1'].mean(), mean2=df['mean2'].mean(),
+            difference=diff, p_value=p_value, ci_low=ci_low, ci_high=ci_high
+        ))
+
+    return pd.concat([sessions, pd.DataFrame(group_rows)], ignore_index=True)
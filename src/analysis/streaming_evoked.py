@@ -0,0 +1,113 @@
+import mne
+import numpy as np
+
+
+class StreamingEvoked:
+    """
+    Accumulates a running mean and variance (Welford) per channel and time point,
+    so evoked responses can be computed without holding the epoch tensor.
+
+    Batches are merged with the parallel form of Welford's update (Chan et al.),
+    which reduces to the classic per-trial update for batches of one epoch.
+
+    Attributes:
+        n (int): Number of trials accumulated.
+        times (np.ndarray or None): Epoch time points in seconds.
+        ch_names (list or None): Channel names matching the first data axis.
+    """
+    def __init__(self, times=None, ch_names=None):
+        self.n = 0
+        self.times = times
+        self.ch_names = ch_names
+        self._mean = None
+        self._m2 = None
+
+    def update(self, batch):
+        """
+        Adds a batch of epochs to the running statistics.
+
+        Args:
+            batch (np.ndarray): Array of shape (n_epochs, n_channels, n_times) or a single (n_channels, n_times) epoch.
+
+        Returns:
+            StreamingEvoked: self
+        """
+        batch = np.asarray(batch, dtype=np.float64)
+        if batch.ndim == 2:
+            batch = batch[np.newaxis]
+        n_batch = batch.shape[0]
+        if n_batch == 0:
+            return self
+
+        batch_mean = batch.mean(axis=0)
+        batch_m2 = ((batch - batch_mean) ** 2).sum(axis=0)
+
+        if self._mean is None:
+            self._mean = batch_mean
+            self._m2 = batch_m2
+            self.n = n_batch
+            return self
+
+        n_total = self.n + n_batch
+        delta = batch_mean - self._mean
+        self._mean += delta * (n_batch / n_total)
+        self._m2 += batch_m2 + delta ** 2 * (self.n * n_batch / n_total)
+        self.n = n_total
+        return self
+
+    @property
+    def mean(self):
+        """np.ndarray: Mean over trials, shape (n_channels, n_times)."""
+        if self._mean is None:
+            raise ValueError("No epochs have been accumulated.")
+        return self._mean
+
+    @property
+    def variance(self):
+        """np.ndarray: Unbiased variance over trials (NaN for fewer than two trials)."""
+        if self.n < 2:
+            return np.full_like(self.mean, np.nan)
+        return self._m2 / (self.n - 1)
+
+    @property
+    def sem(self):
+        """np.ndarray: Standard error of the mean over trials."""
+        return np.sqrt(self.variance / self.n)
+
+    def to_evoked(self, info, comment=''):
+        """
+        Wraps the running mean in an MNE Evoked object.
+
+        Args:
+            info (mne.Info): Measurement info of the source recording; it is reduced to `ch_names`.
+            comment (str): Comment stored on the Evoked object.
+
+        Returns:
+            mne.EvokedArray: Evoked response with nave set to the number of trials.
+        """
+        if self.ch_names is not None:
+            info = mne.pick_info(info, mne.pick_channels(info['ch_names'], include=self.ch_names, ordered=True))
+        tmin = self.times[0] if self.times is not None else 0.0
+        return mne.EvokedArray(self.mean, info, tmin=tmin, nave=self.n, comment=comment)
+
+
+def stream_evoked(builder, tmin, tmax, picks=None, batch_size=64):
+    """
+    Walks the events of an EEGEpochBuilder batch by batch and accumulates the evoked response.
+
+    Args:
+        builder (EEGEpochBuilder): Builder holding the raw data and event criteria.
+        tmin (float): Start time before event in seconds.
+        tmax (float): End time of event in seconds.
+        picks (list or None): Channel names to read. If None, all channels are read.
+        batch_size (int): Number of epochs held in memory at once.
+
+    Returns:
+        StreamingEvoked: Accumulated mean, SEM and trial count.
+    """
+    stream = StreamingEvoked()
+    for batch in builder.iter_epoch_batches(tmin, tmax, batch_size=batch_size, picks=picks):
+        stream.update(batch)
+    stream.times = builder.times
+    stream.ch_names = builder.ch_names
+    return stream
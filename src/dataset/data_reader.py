@@ -5,6 +5,7 @@ from mnelab.io.xdf import read_raw_xdf
 from mne_bids import BIDSPath, read_raw_bids
 from pyxdf import resolve_streams, match_streaminfos
 
+from src.dataset.session_cache import SESSION_CACHE
 from src.utils.graphics import styled_print
 import config as config
 
@@ -40,12 +41,38 @@ class XDFDataReader:
             self._load_stream("Audio", "Audio")
 
 
+def bids_path(sub_id, ses_id):
+    """BIDSPath of a session's raw EEG recording."""
+    return BIDSPath(
+        subject=sub_id, session=ses_id,
+        task='VCV', run='01', datatype='eeg',
+        root=config.BIDS_DIR
+    )
+
+
 class BIDSDatasetReader:
-    def __init__(self, sub_id, ses_id):
+    def __init__(self, sub_id, ses_id, channels=None, event_criteria=None, margin=0.0, use_cache=True):
+        """
+        Reads the processed EEG derivative of a session, preprocessing the raw BIDS data if needed.
+
+        Args:
+            sub_id (str): BIDS subject identifier.
+            ses_id (str): BIDS session identifier.
+            channels (list or None): If given, only these channels are loaded.
+            event_criteria (list or None): List of criteria lists (one per condition). If given, only the
+                time span covered by annotations matching any of them is loaded.
+            margin (float): Seconds kept before the first and after the last matching event.
+            use_cache (bool): Whether to share the loaded data through the process-wide session
+                cache. The returned Raw is then shared and must not be modified in place.
+        """
         styled_print("🚀", "Initializing BIDSDatasetReader Class", "yellow", panel=True)
         self.sub_id = sub_id
         self.ses_id = ses_id
         self.raw = None
+        self.channels = channels
+        self.event_criteria = event_criteria
+        self.margin = margin
+        self.use_cache = use_cache
         
         self._setup_bidspath()
         self.processed_dir = Path(config.BIDS_DIR) / "derivatives" / "processed_eeg"
@@ -54,14 +81,61 @@ class BIDSDatasetReader:
         
         self.read_or_process_data()
     
+    def _cache_key(self):
+        channels = tuple(self.channels) if self.channels is not None else None
+        criteria = tuple(tuple(c) for c in self.event_criteria) if self.event_criteria else None
+        return (self.sub_id, self.ses_id, channels, criteria, self.margin)
+
     def read_or_process_data(self):
+        if self.use_cache:
+            self.processed_file = SESSION_CACHE.get_or_load(self._cache_key(), self._read_or_process)
+        else:
+            self.processed_file = self._read_or_process()
+
+    def _read_or_process(self):
         if self.processed_file.exists():
             styled_print("", f"Loading Processed EEG Data: sub-{self.sub_id} ses-{self.ses_id}", color='green')
-            self.processed_file = mne.io.read_raw_fif(self.processed_file, preload=True, verbose=False)
-        else:
-            self.read_bids_subject_data()
-            self.preprocess()
-            self.save_processed_data()
+            raw = mne.io.read_raw_fif(self.processed_file, preload=False, verbose=False)
+            raw = self._select_data(raw)
+            raw.load_data(verbose=False)
+            return raw
+        self.read_bids_subject_data()
+        self.preprocess()
+        self.save_processed_data()
+        return self._select_data(self.processed_file)
+
+    def _select_data(self, raw):
+        """
+        Restricts the raw data to the requested channels and event time span.
+        Works on non-preloaded data so that only the selected samples are read afterwards.
+
+        Args:
+            raw (mne.io.Raw): Raw EEG data.
+
+        Returns:
+            mne.io.Raw: The same object, picked and cropped in place.
+        """
+        if self.channels is not None:
+            picks = [ch for ch in self.channels if ch in raw.ch_names]
+            if not picks:
+                raise ValueError("None of the requested channels are present in the EEG data.")
+            styled_print('', f'Selecting Channels: {", ".join(picks)}', color='cyan')
+            raw.pick(picks)
+
+        if self.event_criteria:
+            onsets = [
+                event['onset'] for event in raw.annotations
+                if any(all(criterion in event['description'] for criterion in criteria)
+                       for criteria in self.event_criteria)
+            ]
+            if not onsets:
+                raise ValueError("No matching events found for selective loading.")
+            # Raw annotations share the time frame of raw.first_time, with or without orig_time
+            tmin = max(min(onsets) - raw.first_time - self.margin, 0.0)
+            tmax = min(max(onsets) - raw.first_time + self.margin, raw.times[-1])
+            styled_print('', f'Selecting Time Span: {tmin:.1f}s - {tmax:.1f}s', color='cyan')
+            raw.crop(tmin=tmin, tmax=tmax)
+        return raw
     
     def preprocess(self):
         styled_print('', 'Preprocessing EEG', color='red')
@@ -104,11 +178,7 @@ class BIDSDatasetReader:
         self.raw = ica.apply(self.raw)
     
     def _setup_bidspath(self):
-        self.bidspath = BIDSPath(
-            subject=self.sub_id, session=self.ses_id,
-            task='VCV', run='01', datatype='eeg',
-            root=config.BIDS_DIR
-        )   
+        self.bidspath = bids_path(self.sub_id, self.ses_id)
     
     def read_bids_subject_data(self):
         styled_print('', 'Loading Raw Data', color='cyan')
@@ -40,22 +40,16 @@ class EEGEpochBuilder:
                 filtered_events.append(event)
         return filtered_events
 
-    def create_epochs(self, tmin, tmax):
+    def _build_events(self):
         """
-        Creates epochs from EEG data using filtered events.
-        
-        Args:
-            tmin (float): Start time before event in seconds.
-            tmax (float): End time of event in seconds.
-        
+        Converts the filtered annotations into an MNE events array.
+
         Returns:
-            mne.Epochs: The resulting epoched EEG data.
-        
+            tuple: (events array of shape (n_events, 3), event_id_map dict)
+
         Raises:
             ValueError: If no matching events are found.
         """
-        styled_print('', 'Creating EPOCHS', color='green')
-        print_criteria(self.criteria + [tmin, tmax])
         filtered_events = self._filter_events()
 
         if not filtered_events:
@@ -75,11 +69,76 @@ class EEGEpochBuilder:
 
             event_list.append([onset_sample, 0, event_id_map[description]])
 
-        events = np.array(event_list)
+        return np.array(event_list), event_id_map
+
+    def create_epochs(self, tmin, tmax, preload=True):
+        """
+        Creates epochs from EEG data using filtered events.
+        
+        Args:
+            tmin (float): Start time before event in seconds.
+            tmax (float): End time of event in seconds.
+            preload (bool): If False, epochs are read from the raw data on demand.
+        
+        Returns:
+            mne.Epochs: The resulting epoched EEG data.
+        
+        Raises:
+            ValueError: If no matching events are found.
+        """
+        styled_print('', 'Creating EPOCHS', color='green')
+        print_criteria(self.criteria + [tmin, tmax])
+        events, event_id_map = self._build_events()
+
         epochs = mne.Epochs(
             self.eeg_data, events, event_id=event_id_map, 
             tmin=tmin, tmax=tmax, baseline=(tmin, tmin+0.2), 
-            preload=True
+            preload=preload
         )
         self.epochs = epochs
         return epochs
+
+    def iter_epoch_batches(self, tmin, tmax, batch_size=64, picks=None):
+        """
+        Lazily yields epochs in fixed-size batches, reading each batch from the raw data on demand.
+        The baseline (tmin, tmin+0.2) is applied per batch, matching `create_epochs`.
+        Epochs that extend beyond the recording are dropped, as MNE does.
+
+        Sets `self.times`, `self.ch_names` and `self.event_ids` before the first batch is yielded.
+
+        Args:
+            tmin (float): Start time before event in seconds.
+            tmax (float): End time of event in seconds.
+            batch_size (int): Number of epochs per batch.
+            picks (list or None): Channel names to read. If None, all channels are read.
+
+        Yields:
+            np.ndarray: Batch of shape (n_epochs, n_channels, n_times); the last batch may be smaller.
+
+        Raises:
+            ValueError: If no matching events are found.
+        """
+        styled_print('', 'Streaming EPOCHS', color='green')
+        print_criteria(self.criteria + [tmin, tmax])
+        events, _ = self._build_events()
+
+        sfreq = self.eeg_data.info['sfreq']
+        start_offset = int(round(tmin * sfreq))
+        n_times = int(round(tmax * sfreq)) - start_offset + 1
+        starts = events[:, 0] - self.eeg_data.first_samp + start_offset
+        in_bounds = (starts >= 0) & (starts + n_times <= self.eeg_data.n_times)
+        starts = starts[in_bounds]
+
+        self.times = (start_offset + np.arange(n_times)) / sfreq
+        self.ch_names = list(picks) if picks is not None else list(self.eeg_data.ch_names)
+        self.event_ids = events[in_bounds, 2]
+        baseline_mask = (self.times >= tmin) & (self.times <= tmin + 0.2)
+
+        for batch_start in range(0, len(starts), batch_size):
+            batch_starts = starts[batch_start:batch_start + batch_size]
+            batch = np.stack([
+                self.eeg_data.get_data(picks=picks, start=start, stop=start + n_times)
+                for start in batch_starts
+            ])
+            batch -= batch[:, :, baseline_mask].mean(axis=2, keepdims=True)
+            yield batch
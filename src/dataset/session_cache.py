@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+
+from src.utils.graphics import styled_print
+import config as config
+
+
+# Number of striped loading locks; keys hash onto them, so memory stays constant
+_N_KEY_LOCKS = 64
+
+
+def _nbytes(raw):
+    """Approximate in-memory size of a loaded Raw object."""
+    data = getattr(raw, '_data', None)
+    return getattr(data, 'nbytes', 0)
+
+
+class SessionCache:
+    """
+    Process-wide LRU cache of loaded session recordings, bounded by memory.
+
+    Loading is serialized per key through a fixed set of striped locks, so concurrent
+    requests for the same session (e.g. the overt, covert and rest loaders of one pipeline)
+    read or preprocess it once, while different sessions almost always load in parallel. Cached objects are shared: callers must
+    not modify them in place.
+    """
+    def __init__(self, max_bytes=None):
+        """
+        Args:
+            max_bytes (int or None): Memory budget. Defaults to config.SESSION_CACHE_MAX_BYTES.
+        """
+        self.max_bytes = config.SESSION_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(_N_KEY_LOCKS)]
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self):
+        return sum(self._sizes.values())
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            return False, None
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value of `key`, calling `loader()` to produce it on a miss.
+
+        Args:
+            key (hashable): Session key, e.g. (sub_id, ses_id, selection).
+            loader (callable): Zero-argument function returning the loaded Raw.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        with self._key_lock(key):
+            found, value = self._lookup(key)
+            if found:
+                return value
+            value = loader()
+            with self._lock:
+                self.misses += 1
+            self.put(key, value)
+            return value
+
+    def put(self, key, value):
+        """
+        Stores `value`, evicting least recently used sessions until the budget is met.
+        Values larger than the whole budget are not cached.
+        """
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            styled_print('', f'Session {key} exceeds the cache budget, not caching', color='yellow')
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            while self.nbytes > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                self._sizes.pop(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+SESSION_CACHE = SessionCache()
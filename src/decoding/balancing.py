@@ -0,0 +1,44 @@
+import numpy as np
+
+
+BALANCE_MODES = (None, 'oversample', 'class_weight')
+
+
+def balanced_indices(y, random_state=42):
+    """
+    Random oversampling expressed as indices: every sample once, plus minority-class samples
+    drawn with replacement until each class matches the majority count. Indexing the data
+    with the result is equivalent to RandomOverSampler without materializing the copies.
+
+    Args:
+        y (np.ndarray): Labels of shape (n_samples,).
+        random_state (int): Seed of the resampling.
+
+    Returns:
+        np.ndarray: Sample indices, original samples first.
+    """
+    y = np.asarray(y)
+    rng = np.random.default_rng(random_state)
+    classes, counts = np.unique(y, return_counts=True)
+    target = counts.max()
+    extra = [
+        rng.choice(np.flatnonzero(y == c), target - n, replace=True)
+        for c, n in zip(classes, counts) if n < target
+    ]
+    return np.concatenate([np.arange(len(y))] + extra)
+
+
+def class_weights(y):
+    """
+    Inverse-frequency class weights, n_samples / (n_classes * count), as used by Keras' class_weight.
+
+    Args:
+        y (np.ndarray): Labels of shape (n_samples,).
+
+    Returns:
+        dict: class -> weight.
+    """
+    classes, counts = np.unique(np.asarray(y), return_counts=True)
+    weights = len(y) / (len(classes) * counts)
+    return {int(c): float(w) for c, w in zip(classes, weights)}
+
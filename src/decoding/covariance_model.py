@@ -0,0 +1,192 @@
+import time
+import pickle
+import numpy as np
+from pathlib import Path
+from scipy.linalg import eigh
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+
+from src.decoding.balancing import BALANCE_MODES, balanced_indices, class_weights
+
+
+def epoch_covariances(X, shrinkage=0.1, normalize=False, batch_size=256, indices=None):
+    """
+    Spatial covariance of every epoch, computed with one einsum per batch of epochs and
+    shrunk towards a scaled identity so that every matrix is well conditioned.
+
+    Args:
+        X (array-like): Epochs of shape (n_epochs, n_channels, n_times), e.g. memory-mapped.
+        shrinkage (float): Weight of the identity target, in [0, 1].
+        normalize (bool): Whether to z-score every (epoch, channel) pair over time first.
+        batch_size (int): Epochs read from X at once.
+        indices (array-like or None): Epochs to compute, or None for all of them.
+
+    Returns:
+        np.ndarray: Covariances of shape (n_indices, n_channels, n_channels).
+    """
+    _, n_channels, n_times = X.shape
+    indices = np.arange(len(X)) if indices is None else np.asarray(indices)
+    covs = np.empty((len(indices), n_channels, n_channels))
+    for start in range(0, len(indices), batch_size):
+        idx = slice(start, min(start + batch_size, len(indices)))
+        batch = np.asarray(X[indices[idx]], dtype=np.float64)
+        batch = batch - batch.mean(axis=2, keepdims=True)
+        if normalize:
+            batch /= batch.std(axis=2, keepdims=True) + 1e-8
+        covs[idx] = np.einsum('nct,ndt->ncd', batch, batch) / (n_times - 1)
+
+    trace = np.trace(covs, axis1=1, axis2=2)[:, np.newaxis, np.newaxis] / n_channels
+    return (1 - shrinkage) * covs + shrinkage * trace * np.eye(n_channels)
+
+
+def _spd_function(covs, func):
+    """Applies `func` to the eigenvalues of a stack of symmetric positive definite matrices."""
+    eigvals, eigvecs = np.linalg.eigh(covs)
+    return (eigvecs * func(eigvals)[..., np.newaxis, :]) @ np.swapaxes(eigvecs, -1, -2)
+
+
+class TangentSpace:
+    """
+    Projects covariances to the tangent space at their log-Euclidean mean: whitening by the
+    reference, matrix logarithm and upper-triangle vectorization (off-diagonal terms scaled
+    by sqrt(2) so Euclidean distances match the Riemannian ones).
+    """
+    def fit(self, covs, y=None):
+        reference = _spd_function(_spd_function(covs, np.log).mean(axis=0), np.exp)
+        self.whitening = _spd_function(reference, lambda w: w ** -0.5)
+        return self
+
+    def transform(self, covs):
+        tangent = _spd_function(self.whitening @ covs @ self.whitening, np.log)
+        rows, cols = np.triu_indices(covs.shape[-1])
+        weights = np.where(rows == cols, 1.0, np.sqrt(2))
+        return tangent[:, rows, cols] * weights
+
+
+class CSP:
+    """
+    One-vs-rest common spatial patterns: for every class, the filters with the most extreme
+    variance ratio against the other classes; features are log-variances of the filtered epochs.
+    """
+    def __init__(self, n_filters=4):
+        self.n_filters = n_filters
+
+    def fit(self, covs, y):
+        filters = []
+        for label in np.unique(y):
+            class_cov = covs[y == label].mean(axis=0)
+            rest_cov = covs[y != label].mean(axis=0)
+            _, eigvecs = eigh(class_cov, class_cov + rest_cov)
+            half = self.n_filters // 2
+            filters.append(np.concatenate([eigvecs[:, :half], eigvecs[:, -(self.n_filters - half):]], axis=1).T)
+        self.filters = np.concatenate(filters, axis=0)
+        return self
+
+    def transform(self, covs):
+        variances = np.einsum('fc,ncd,fd->nf', self.filters, covs, self.filters)
+        return np.log(variances / variances.sum(axis=1, keepdims=True))
+
+
+class CovarianceClassifier:
+    """
+    Classical overt/covert/rest decoder: batched spatial covariances, tangent-space or CSP
+    features and a multinomial logistic regression. Mirrors the training interface of
+    OvertCoverRestClassifier so pipelines can swap backends; trains in seconds on CPU.
+    """
+    def __init__(self, method='tangent', shrinkage=0.1, n_filters=4, C=1.0):
+        """
+        Args:
+            method (str): 'tangent' (tangent space) or 'csp'.
+            shrinkage (float): Covariance shrinkage towards the identity.
+            n_filters (int): CSP filters per class.
+            C (float): Inverse L2 regularization strength of the logistic regression.
+        """
+        if method not in ('tangent', 'csp'):
+            raise ValueError("Invalid method. Choose from 'tangent' or 'csp'.")
+        self.method = method
+        self.shrinkage = shrinkage
+        self.n_filters = n_filters
+        self.C = C
+        self.features = None
+        self.classifier = None
+
+    def compileModel(self, **kwargs):
+        """No-op, kept for interface compatibility with OvertCoverRestClassifier."""
+
+    def summary(self):
+        print(f"CovarianceClassifier(method={self.method}, shrinkage={self.shrinkage}, "
+              f"n_filters={self.n_filters}, C={self.C})")
+
+    def fit(self, covs, y, classWeight=None):
+        self.features = TangentSpace() if self.method == 'tangent' else CSP(self.n_filters)
+        self.classifier = make_pipeline(
+            StandardScaler(), LogisticRegression(C=self.C, max_iter=1000, class_weight=classWeight)
+        )
+        self.classifier.fit(self.features.fit(covs, y).transform(covs), y)
+        return self
+
+    def predict_proba(self, X, normalize=False):
+        covs = epoch_covariances(X, shrinkage=self.shrinkage, normalize=normalize)
+        return self.classifier.predict_proba(self.features.transform(covs))
+
+    def predict(self, X, normalize=False):
+        return self.classifier.classes_[np.argmax(self.predict_proba(X, normalize=normalize), axis=1)]
+
+    def trainWithSplit(self, X, y, validationSplit=0.2, shuffle=True, balance=None, normalize=False, **kwargs):
+        """
+        Same split and outputs as OvertCoverRestClassifier.trainWithSplit. CNN-only options
+        (epochs, batchSize, patience) are ignored.
+        """
+        y = np.asarray(y)
+        train_idx, val_idx = train_test_split(
+            np.arange(len(y)), test_size=validationSplit, stratify=y, random_state=42, shuffle=shuffle
+        )
+        return self.trainOnIndices(X, y, train_idx, val_idx, balance=balance, normalize=normalize)
+
+    def trainOnIndices(self, X, y, train_idx, val_idx, test_idx=None, balance=None, normalize=False, **kwargs):
+        """
+        Fits on `train_idx` and evaluates on `test_idx` (or `val_idx`, which needs no early
+        stopping here). See OvertCoverRestClassifier.trainOnIndices. The time spent on the
+        training covariances and the fit, without evaluation, is kept in self.fitSeconds.
+
+        Returns:
+            tuple: (accuracy, classification report dict, confusion matrix over all classes of y).
+        """
+        if balance not in BALANCE_MODES:
+            raise ValueError("Invalid balance. Choose from None, 'oversample' or 'class_weight'.")
+        y = np.asarray(y)
+        train_idx = np.asarray(train_idx)
+        eval_idx = np.sort(val_idx if test_idx is None else test_idx)
+
+        classWeight = None
+        if balance == 'oversample':
+            train_idx = train_idx[balanced_indices(y[train_idx])]
+        elif balance == 'class_weight':
+            classWeight = class_weights(y[train_idx])
+        self.trainSamples = len(train_idx)
+
+        start = time.perf_counter()
+        unique_idx = np.unique(train_idx)  # oversampled epochs share one covariance
+        covs = epoch_covariances(X, shrinkage=self.shrinkage, normalize=normalize, indices=unique_idx)
+        self.fit(covs[np.searchsorted(unique_idx, train_idx)], y[train_idx], classWeight=classWeight)
+        self.fitSeconds = time.perf_counter() - start
+
+        eval_covs = epoch_covariances(X, shrinkage=self.shrinkage, normalize=normalize, indices=eval_idx)
+        y_pred = self.classifier.predict(self.features.transform(eval_covs))
+        y_eval = y[eval_idx]
+        report = classification_report(y_eval, y_pred, digits=4, output_dict=True)
+        conf_matrix = confusion_matrix(y_eval, y_pred, labels=np.unique(y))
+        accuracy = accuracy_score(y_eval, y_pred)
+        return accuracy, report, conf_matrix
+
+    def saveWeights(self, filepath):
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'wb') as f:
+            pickle.dump({"params": self.__dict__}, f)
+
+    def loadWeights(self, filepath):
+        with open(filepath, 'rb') as f:
+            self.__dict__.update(pickle.load(f)["params"])
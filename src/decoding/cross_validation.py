@@ -0,0 +1,216 @@
+import os
+import time
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from contextlib import contextmanager
+from threadpoolctl import threadpool_limits
+from sklearn.model_selection import StratifiedKFold, RepeatedStratifiedKFold, train_test_split
+
+from src.utils.parallel import run_per_session
+from src.utils.graphics import styled_print
+import config as config
+
+
+_thread_limits = None  # kept for the lifetime of a worker
+
+
+def _limit_threads(n_threads):
+    """
+    Worker initializer capping the BLAS and TensorFlow thread pools, so that parallel
+    folds share the CPU instead of oversubscribing it. numpy's BLAS is already loaded when
+    the initializer runs and has read its environment, so it is capped through threadpoolctl;
+    the environment variables cover libraries loaded later (e.g. scipy's BLAS).
+    """
+    global _thread_limits
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ[var] = str(n_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    _thread_limits = threadpool_limits(limits=n_threads)
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+@contextmanager
+def _shared_array(X):
+    """
+    Yields what workers receive in place of X: a .npy path they can memory-map (the backing
+    file of X if X is a full np.load memmap, otherwise a temporary copy), or X itself if it
+    is a lazy array-like that pickles cheaply (e.g. PooledFeatureArray).
+    """
+    if not isinstance(X, np.ndarray):
+        yield X
+        return
+    if isinstance(X, np.memmap) and X.filename:
+        try:
+            full = np.load(X.filename, mmap_mode='r')
+        except ValueError:
+            full = None
+        if full is not None and (full.shape, full.strides, full.dtype) == (X.shape, X.strides, X.dtype):
+            yield X.filename
+            return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "X.npy"
+        np.save(path, np.asarray(X, dtype=np.float32))
+        yield str(path)
+
+
+class _FoldTask:
+    """Picklable worker training and evaluating a decoder on one fold."""
+    def __init__(self, source, y, train_kwargs, backend='cnn', hyperparameters=None):
+        self.source = source
+        self.y = y
+        self.train_kwargs = train_kwargs
+        self.backend = backend
+        self.hyperparameters = hyperparameters
+
+    def __call__(self, key, split):
+        # split is (train, val) or (train, val, test); results are reported on the last part
+        X = np.load(self.source, mmap_mode='r') if isinstance(self.source, str) else self.source
+        start = time.perf_counter()
+        train_kwargs = dict(self.train_kwargs)
+        if self.backend == 'covariance':
+            from src.decoding.covariance_model import CovarianceClassifier
+            model = CovarianceClassifier()
+        else:
+            from src.decoding.hyperparameters import resolve_hyperparameters, crop_time_window, build_classifier
+            hyperparameters = resolve_hyperparameters(self.hyperparameters)
+            X = crop_time_window(X, hyperparameters["time_window"])
+            model = build_classifier(X.shape[1:], hyperparameters)
+            model.compileModel(learningRate=hyperparameters["learning_rate"])
+            train_kwargs.setdefault("batchSize", hyperparameters["batch_size"])
+        accuracy, report, conf_matrix = model.trainOnIndices(X, self.y, *split, **train_kwargs)
+        return {
+            "accuracy": accuracy,
+            "macro_f1": report["macro avg"]["f1-score"],
+            "report": report,
+            "confusion_matrix": conf_matrix,
+            "n_train": len(split[0]),
+            "n_val": len(split[-1]),
+            "fit_seconds": time.perf_counter() - start
+        }
+
+
+def cross_validate(X, y, n_splits=None, n_repeats=None, random_state=42, max_workers=None,
+                   threads_per_worker=None, backend='cnn', hyperparameters=None, **train_kwargs):
+    """
+    Stratified (repeated) K-fold cross-validation of OvertCoverRestClassifier, with folds
+    trained concurrently in spawned processes. Workers memory-map X instead of receiving
+    a copy, and each is limited to `threads_per_worker` compute threads.
+
+    Args:
+        X (np.ndarray): Data of shape (n_samples, n_channels, n_times), possibly memory-mapped.
+        y (np.ndarray): Labels of shape (n_samples,).
+        n_splits (int or None): Number of folds. Defaults to config.CV_FOLDS.
+        n_repeats (int or None): Number of repetitions with different splits. Defaults to config.CV_REPEATS.
+        random_state (int): Seed of the splits.
+        max_workers (int or None): Number of concurrent folds. Defaults to config.MAX_WORKERS.
+        threads_per_worker (int or None): Thread cap per fold. Defaults to config.THREADS_PER_WORKER.
+        backend (str): 'cnn' (OvertCoverRestClassifier) or 'covariance' (CovarianceClassifier).
+        hyperparameters (dict or None): CNN hyperparameters (see resolve_hyperparameters).
+        **train_kwargs: Forwarded to the decoder's trainOnIndices (e.g. epochs, balance).
+
+    Returns:
+        dict: 'folds' (pd.DataFrame, one row per fold with metrics and timings), 'summary'
+            (pd.DataFrame, mean/std/min/max of the fold metrics), 'confusion_matrices'
+            ({(repeat, fold): np.ndarray}) and 'confusion_matrix' (summed over folds).
+    """
+    n_splits = config.CV_FOLDS if n_splits is None else n_splits
+    n_repeats = config.CV_REPEATS if n_repeats is None else n_repeats
+    y = np.asarray(y)
+
+    if n_repeats > 1:
+        splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=random_state)
+    else:
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    splits = [(divmod(i, n_splits), split) for i, split in enumerate(splitter.split(np.zeros(len(y)), y))]
+
+    styled_print('', f'Cross-validating: {n_repeats} x {n_splits} folds', color='green')
+    return _run_folds(X, y, splits, ["repeat", "fold"], max_workers, threads_per_worker, backend,
+                      hyperparameters, train_kwargs)
+
+
+def leave_one_subject_out(X, y, groups, val_fraction=0.1, random_state=42, max_workers=None,
+                          threads_per_worker=None, backend='cnn', hyperparameters=None, **train_kwargs):
+    """
+    Leave-one-subject-out evaluation: every fold trains on all other subjects, early-stops on
+    a stratified `val_fraction` of their samples and tests on the held-out subject. Folds run
+    in parallel processes as in cross_validate.
+
+    Args:
+        X (array-like): Data of shape (n_samples, n_channels, n_times), e.g. a PooledFeatureArray.
+        y (np.ndarray): Labels of shape (n_samples,).
+        groups (np.ndarray): Subject ID of every sample.
+        val_fraction (float): Fraction of the training subjects' samples used for early stopping.
+        random_state (int): Seed of the validation split.
+        max_workers (int or None): Number of concurrent folds. Defaults to config.MAX_WORKERS.
+        threads_per_worker (int or None): Thread cap per fold. Defaults to config.THREADS_PER_WORKER.
+        backend (str): 'cnn' (OvertCoverRestClassifier) or 'covariance' (CovarianceClassifier).
+        hyperparameters (dict or None): CNN hyperparameters (see resolve_hyperparameters).
+        **train_kwargs: Forwarded to the decoder's trainOnIndices.
+
+    Returns:
+        dict: As cross_validate, with folds keyed by the held-out subject.
+    """
+    y = np.asarray(y)
+    groups = np.asarray(groups)
+    subjects = list(dict.fromkeys(groups))
+    if len(subjects) < 2:
+        raise ValueError("Leave-one-subject-out needs at least two subjects.")
+
+    splits = []
+    for subject in subjects:
+        train_idx = np.flatnonzero(groups != subject)
+        train_idx, val_idx = train_test_split(
+            train_idx, test_size=val_fraction, stratify=y[train_idx], random_state=random_state
+        )
+        splits.append(((subject,), (train_idx, val_idx, np.flatnonzero(groups == subject))))
+
+    styled_print('', f'Leave-one-subject-out: {len(subjects)} folds', color='green')
+    return _run_folds(X, y, splits, ["subject"], max_workers, threads_per_worker, backend,
+                      hyperparameters, train_kwargs)
+
+
+def _run_folds(X, y, splits, key_names, max_workers, threads_per_worker, backend, hyperparameters, train_kwargs):
+    """
+    Trains every (key, split) fold in spawned, thread-limited processes and collects the
+    per-fold metrics, their summary and the confusion matrices.
+    """
+    threads_per_worker = config.THREADS_PER_WORKER if threads_per_worker is None else threads_per_worker
+    start = time.perf_counter()
+    with _shared_array(X) as source:
+        results, errors = run_per_session(
+            _FoldTask(source, y, train_kwargs, backend, hyperparameters), splits,
+            max_workers=max_workers, backend='process',
+            initializer=_limit_threads, initargs=(threads_per_worker,),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    wall_seconds = time.perf_counter() - start
+
+    for key, e in errors.items():
+        styled_print('', f'Fold {dict(zip(key_names, key))} failed: {e}', color='red')
+    if not results:
+        raise RuntimeError("All folds failed.")
+
+    folds = pd.DataFrame([
+        {**dict(zip(key_names, key)),
+         **{k: v for k, v in result.items() if k not in ("report", "confusion_matrix")}}
+        for key, result in results.items()
+    ])
+    metrics = folds[["accuracy", "macro_f1", "fit_seconds"]]
+    summary = metrics.agg(["mean", "std", "min", "max"]).transpose().reset_index(names="metric")
+    summary["n_folds"] = len(folds)
+    summary["wall_seconds"] = wall_seconds
+
+    confusion_matrices = {key: result["confusion_matrix"] for key, result in results.items()}
+    return {
+        "folds": folds,
+        "summary": summary,
+        "confusion_matrices": confusion_matrices,
+        "confusion_matrix": np.sum(list(confusion_matrices.values()), axis=0)
+    }
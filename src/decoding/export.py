@@ -0,0 +1,221 @@
+import json
+import numpy as np
+import tensorflow as tf
+from pathlib import Path
+
+from src.decoding.input_pipeline import normalize_per_sample_per_channel
+from src.utils.graphics import styled_print
+import config as config
+
+
+CLASS_NAMES = {0: 'overt', 1: 'covert', 2: 'rest'}
+QUANTIZATION_MODES = (None, 'float16', 'int8')
+EXPORT_FORMATS = ('tflite', 'savedmodel')
+
+
+class PerSampleChannelNormalization(tf.keras.layers.Layer):
+    """Keras layer applying normalize_per_sample_per_channel, so exports take raw epochs."""
+    def call(self, inputs):
+        return normalize_per_sample_per_channel(inputs)
+
+
+def _inference_model(classifier, input_shape, input_scale=1.0):
+    """
+    Functional model taking raw epochs (batch, n_channels, n_times): per-sample per-channel
+    normalization followed by the trained network, so exports need no preprocessing code.
+    `input_scale` multiplies the epochs first; the normalization cancels it, but it brings
+    EEG voltages (~1e-5 V) to unit scale so int8 quantization of the normalization works.
+    """
+    inputs = tf.keras.Input(shape=input_shape, name='epochs')
+    scaled = tf.keras.layers.Rescaling(input_scale)(inputs) if input_scale != 1.0 else inputs
+    outputs = classifier.model(PerSampleChannelNormalization()(scaled), training=False)
+    return tf.keras.Model(inputs, outputs)
+
+
+def _label_agreement(tflite_model, model, epochs):
+    """
+    Fraction of `epochs` for which a TFLite flatbuffer predicts the same class as the Keras model.
+    """
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    input_index = interpreter.get_input_details()[0]['index']
+    interpreter.resize_tensor_input(input_index, epochs.shape)
+    interpreter.allocate_tensors()
+    interpreter.set_tensor(input_index, epochs)
+    interpreter.invoke()
+    quantized = interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+    reference = np.asarray(model(epochs, training=False))
+    return float(np.mean(quantized.argmax(axis=1) == reference.argmax(axis=1)))
+
+
+def export_path(checkpoint_path, quantization=None, fmt='tflite'):
+    """
+    Export location next to a '.weights.h5' checkpoint: <stem>[_<quantization>].tflite or
+    <stem>_savedmodel.
+
+    Args:
+        checkpoint_path (str or Path): Weights of the exported model.
+        quantization (str or None): None, 'float16' or 'int8' (TFLite only).
+        fmt (str): 'tflite' or 'savedmodel'.
+
+    Returns:
+        Path: Target .tflite file or SavedModel directory.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError("Invalid fmt. Choose from 'tflite' or 'savedmodel'.")
+    checkpoint_path = Path(checkpoint_path)
+    stem = checkpoint_path.name.replace('.weights.h5', '')
+    if fmt == 'savedmodel':
+        return checkpoint_path.with_name(f"{stem}_savedmodel")
+    return checkpoint_path.with_name(f"{stem}_{quantization}.tflite" if quantization else f"{stem}.tflite")
+
+
+def export_classifier(classifier, output_path, quantization=None, representative_data=None, n_calibration=200,
+                      time_window=None, min_agreement=None):
+    """
+    Exports a trained OvertCoverRestClassifier for inference without the training code:
+    a TFLite flatbuffer (".tflite" path) or a SavedModel directory (any other path), plus a
+    JSON sidecar with the input shape, class names and quantization.
+
+    Args:
+        classifier (OvertCoverRestClassifier): Trained classifier.
+        output_path (str or Path): Target .tflite file or SavedModel directory.
+        quantization (str or None): TFLite post-training quantization: None, 'float16'
+            (half-precision weights) or 'int8' (integer weights and activations, float I/O).
+        representative_data (array-like or None): Raw (un-normalized) epochs of shape
+            (n, n_channels, n_times), as the exported model receives them, used to calibrate
+            'int8' activation ranges and to check the int8 predictions against the float model.
+        n_calibration (int): Maximum number of calibration epochs, spread evenly over the data.
+        time_window (list or None): (start, stop) samples the model was trained on, recorded
+            so OvertCovertRestPredictor can crop full epochs.
+        min_agreement (float or None): Minimum fraction of check epochs on which an 'int8' export
+            must predict the float model's class. Defaults to config.INT8_MIN_AGREEMENT.
+
+    Returns:
+        Path: The exported model.
+
+    Raises:
+        RuntimeError: If the int8 model disagrees with the float model too often. Nothing is written.
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError("Invalid quantization. Choose from None, 'float16' or 'int8'.")
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    input_shape = tuple(int(dim) for dim in classifier.model.input_shape[1:])
+    input_scale = 1.0
+    if quantization == 'int8':
+        if representative_data is None:
+            raise ValueError("int8 quantization needs representative_data for calibration.")
+        # Evenly spaced, so every class (stored contiguously) contributes to the ranges
+        calibration_idx = np.unique(np.linspace(
+            0, len(representative_data) - 1, min(n_calibration, len(representative_data))
+        ).astype(int))
+        calibration = np.asarray(representative_data[calibration_idx], dtype=np.float32)
+        input_scale = float(1.0 / (np.median(calibration.std(axis=2)) + 1e-12))
+    model = _inference_model(classifier, input_shape, input_scale)
+
+    if output_path.suffix == '.tflite':
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        if quantization is not None:
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantization == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+        elif quantization == 'int8':
+            converter.representative_dataset = lambda: ([epoch[np.newaxis]] for epoch in calibration)
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        tflite_model = converter.convert()
+        if quantization == 'int8':
+            min_agreement = config.INT8_MIN_AGREEMENT if min_agreement is None else min_agreement
+            agreement = _label_agreement(tflite_model, model, calibration[::max(1, len(calibration) // 32)])
+            if agreement < min_agreement:
+                raise RuntimeError(f"int8 model agrees with the float model on only {agreement:.0%} of check "
+                                   f"epochs (minimum {min_agreement:.0%}); not exported.")
+            styled_print('', f'int8 model agrees with the float model on {agreement:.0%} of check epochs', color='green')
+        output_path.write_bytes(tflite_model)
+    else:
+        if quantization is not None:
+            raise ValueError("Quantization is only supported for TFLite (.tflite) exports.")
+        model.export(str(output_path))
+
+    metadata = {
+        "input_shape": list(input_shape),
+        "input_scale": input_scale,
+        "int8_agreement": agreement if quantization == 'int8' else None,
+        "classes": CLASS_NAMES,
+        "quantization": quantization,
+        "time_window": None if time_window is None else [int(sample) for sample in time_window],
+        "normalization": "per-sample per-channel z-score (in graph)"
+    }
+    output_path.with_name(output_path.name + '.json').write_text(json.dumps(metadata, indent=2))
+    styled_print('', f'Exported model to {output_path}', color='green')
+    return output_path
+
+
+class OvertCovertRestPredictor:
+    """
+    Lightweight CPU runtime for exported classifiers. TFLite models run on a reused
+    interpreter whose input is only resized when the batch size changes, avoiding the
+    per-call overhead of Keras predict.
+
+    Usage:
+        predictor = OvertCovertRestPredictor('model.tflite')
+        labels = predictor.predict(epochs)          # (n, n_channels, n_times)
+        probs = predictor.predict_one(epoch)        # (n_channels, n_times)
+    """
+    def __init__(self, model_path, num_threads=1):
+        """
+        Args:
+            model_path (str or Path): Exported .tflite file or SavedModel directory.
+            num_threads (int): Interpreter threads (TFLite only).
+        """
+        self.model_path = Path(model_path)
+        sidecar = self.model_path.with_name(self.model_path.name + '.json')
+        self.metadata = json.loads(sidecar.read_text()) if sidecar.exists() else {}
+        self.classes = {int(k): v for k, v in self.metadata.get("classes", CLASS_NAMES).items()}
+        self.time_window = self.metadata.get("time_window")
+
+        if self.model_path.suffix == '.tflite':
+            self.interpreter = tf.lite.Interpreter(model_path=str(self.model_path), num_threads=num_threads)
+            self._input = self.interpreter.get_input_details()[0]['index']
+            self._output = self.interpreter.get_output_details()[0]['index']
+            self._batch_size = None
+            self._serve = None
+        else:
+            self.interpreter = None
+            self._saved_model = tf.saved_model.load(str(self.model_path))  # keeps the variables alive
+            self._serve = self._saved_model.serve
+
+    def predict_proba(self, X):
+        """
+        Class probabilities of a batch of raw epochs. Full epochs are cropped to the time
+        window the model was trained on.
+
+        Args:
+            X (np.ndarray): Epochs of shape (n, n_channels, n_times).
+
+        Returns:
+            np.ndarray: Probabilities of shape (n, n_classes).
+        """
+        if self.time_window is not None and X.shape[-1] != self.metadata["input_shape"][-1]:
+            start, stop = self.time_window
+            X = X[..., start:stop]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.interpreter is None:
+            return self._serve(tf.constant(X)).numpy()
+
+        if self._batch_size != len(X):
+            self.interpreter.resize_tensor_input(self._input, X.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = len(X)
+        self.interpreter.set_tensor(self._input, X)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output).copy()
+
+    def predict(self, X):
+        """Predicted class labels of a batch of raw epochs."""
+        return np.argmax(self.predict_proba(X), axis=1)
+
+    def predict_one(self, epoch):
+        """
+        Class probabilities of a single epoch of shape (n_channels, n_times).
+        """
+        return self.predict_proba(np.asarray(epoch)[np.newaxis])[0]
@@ -0,0 +1,246 @@
+import os
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+from src.utils.graphics import styled_print
+import config as config
+
+
+FEATURE_STORE_DIR = Path(config.BIDS_DIR) / "derivatives" / "decoding_features"
+
+# Bump when the stored tensor layout or epoching changes, invalidating every entry
+FEATURE_STORE_VERSION = 1
+
+
+def derivative_version(sub_id, ses_id):
+    """
+    Identifies the processed derivative a session's features were computed from.
+
+    Returns:
+        list or None: [size, mtime_ns] of the processed FIF, or None if it does not exist yet.
+    """
+    processed = Path(config.BIDS_DIR) / "derivatives" / "processed_eeg" / f"sub-{sub_id}_ses-{ses_id}_processed-raw.fif"
+    if not processed.exists():
+        return None
+    stat = processed.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def feature_key(sub_id, ses_id, condition_configs):
+    """
+    Hash of everything the stored tensor depends on: the session, its processed derivative,
+    the labelled condition configs and the store layout version.
+
+    Args:
+        sub_id (str): Subject ID.
+        ses_id (str): Session ID.
+        condition_configs (list): (label, condition_config) pairs in concatenation order.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    payload = {
+        "session": [sub_id, ses_id],
+        "derivative": derivative_version(sub_id, ses_id),
+        "conditions": [[label, cfg] for label, cfg in condition_configs],
+        "version": FEATURE_STORE_VERSION
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DecodingFeatureStore:
+    """
+    Persists each session's epoch tensor X (n_epochs, n_channels, n_times) and labels y as
+    .npy files that are opened memory-mapped, plus a JSON sidecar with the key and metadata.
+    Entries are written atomically and are only returned when their key matches.
+    """
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory (str or Path or None): Store location. Defaults to FEATURE_STORE_DIR.
+        """
+        self.directory = Path(FEATURE_STORE_DIR if directory is None else directory)
+
+    def _paths(self, sub_id, ses_id):
+        stem = self.directory / f"sub-{sub_id}_ses-{ses_id}"
+        return {
+            "X": stem.with_name(stem.name + "_X.npy"),
+            "y": stem.with_name(stem.name + "_y.npy"),
+            "meta": stem.with_name(stem.name + "_meta.json")
+        }
+
+    def load(self, sub_id, ses_id, key, mmap_mode='r'):
+        """
+        Opens a stored session if it was written with `key`.
+
+        Args:
+            sub_id (str): Subject ID.
+            ses_id (str): Session ID.
+            key (str): Expected feature key (see feature_key).
+            mmap_mode (str or None): np.load memory-map mode; None reads into memory.
+
+        Returns:
+            tuple or None: (X, y, meta), or None if missing or stale.
+        """
+        paths = self._paths(sub_id, ses_id)
+        if not all(path.exists() for path in paths.values()):
+            return None
+        meta = json.loads(paths["meta"].read_text())
+        if meta.get("key") != key:
+            return None
+        X = np.load(paths["X"], mmap_mode=mmap_mode)
+        y = np.load(paths["y"], mmap_mode=mmap_mode)
+        return X, y, meta
+
+    def save(self, sub_id, ses_id, key, X, y, **meta):
+        """
+        Writes a session's features, replacing any previous entry.
+
+        Args:
+            sub_id (str): Subject ID.
+            ses_id (str): Session ID.
+            key (str): Feature key (see feature_key).
+            X (np.ndarray): Epoch tensor of shape (n_epochs, n_channels, n_times).
+            y (np.ndarray): Labels of shape (n_epochs,).
+            **meta: Extra JSON-serializable metadata stored in the sidecar.
+
+        Returns:
+            dict: Paths of the written files.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        paths = self._paths(sub_id, ses_id)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.ascontiguousarray(y, dtype=np.int64)
+
+        for name, array in (("X", X), ("y", y)):
+            tmp = paths[name].with_suffix(".tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, paths[name])
+
+        sidecar = {
+            "key": key,
+            "shape": list(X.shape),
+            "classes": {str(c): int(n) for c, n in zip(*np.unique(y, return_counts=True))},
+            **meta
+        }
+        tmp = paths["meta"].with_suffix(".tmp")
+        tmp.write_text(json.dumps(sidecar, indent=2, sort_keys=True, default=str))
+        os.replace(tmp, paths["meta"])  # written last: marks the entry complete
+
+        styled_print('', f'Features stored: sub-{sub_id}, ses-{ses_id} {tuple(X.shape)}', color='green')
+        return paths
+
+    def get_or_compute(self, sub_id, ses_id, condition_configs, compute, mmap_mode='r'):
+        """
+        Returns the stored features of a session, computing and storing them on a miss.
+
+        Args:
+            sub_id (str): Subject ID.
+            ses_id (str): Session ID.
+            condition_configs (list): (label, condition_config) pairs in concatenation order.
+            compute (callable): Zero-argument function returning (X, y).
+            mmap_mode (str or None): np.load memory-map mode.
+
+        Returns:
+            tuple: (X, y) arrays, memory-mapped unless mmap_mode is None.
+        """
+        key = feature_key(sub_id, ses_id, condition_configs)
+        stored = self.load(sub_id, ses_id, key, mmap_mode=mmap_mode)
+        if stored is not None:
+            styled_print('', f'Loaded stored features: sub-{sub_id}, ses-{ses_id}', color='green')
+            return stored[0], stored[1]
+
+        X, y = compute()
+        key = feature_key(sub_id, ses_id, condition_configs)  # the derivative may have just been created
+        self.save(sub_id, ses_id, key, X, y, conditions=[[label, cfg] for label, cfg in condition_configs])
+        X, y, _ = self.load(sub_id, ses_id, key, mmap_mode=mmap_mode)
+        return X, y
+
+    def pooled(self, sessions, channels=slice(None)):
+        """
+        Lazily concatenates stored sessions along the sample axis, in the given order.
+
+        Args:
+            sessions (list): (subject_id, session_id) pairs with existing entries.
+            channels (slice): Channel selection applied to every session.
+
+        Returns:
+            PooledFeatureArray: Memory-mapped view of all sessions.
+        """
+        return PooledFeatureArray([self._paths(sub_id, ses_id)["X"] for sub_id, ses_id in sessions], channels)
+
+
+def _compose_slices(outer, inner, length):
+    """Single slice equivalent to applying `outer`, then `inner`, to an axis of `length` elements."""
+    selected = range(length)[outer][inner]
+    return slice(selected.start, selected.stop if selected.stop >= 0 else None, selected.step)
+
+
+class PooledFeatureArray:
+    """
+    Read-only concatenation of several stored epoch tensors along the sample axis. Indexing
+    with sample indices reads only those epochs from the memory-mapped files, and pickling
+    sends the file paths only, so worker processes open the files themselves.
+
+    Slicing the channel or time axis while keeping all samples, e.g. X[:, :, start:stop],
+    returns another lazy PooledFeatureArray; other multi-axis keys read the selected samples
+    and index the result.
+    """
+    def __init__(self, paths, channels=slice(None), times=slice(None)):
+        """
+        Args:
+            paths (list): Stored X .npy files.
+            channels (slice): Channel selection applied to every file.
+            times (slice): Time selection applied to every file.
+        """
+        self.paths = [str(path) for path in paths]
+        self.channels = channels
+        self.times = times
+        self._open()
+
+    def _open(self):
+        stored = [np.load(path, mmap_mode='r') for path in self.paths]
+        self._stored_shape = stored[0].shape[1:]
+        self.arrays = [array[:, self.channels, self.times] for array in stored]
+        if len({array.shape[1:] for array in self.arrays}) > 1:
+            raise ValueError("Stored sessions have different epoch shapes and cannot be pooled.")
+        self.offsets = np.concatenate([[0], np.cumsum([len(array) for array in self.arrays])])
+        self.shape = (int(self.offsets[-1]),) + self.arrays[0].shape[1:]
+        self.dtype = self.arrays[0].dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, indices):
+        if isinstance(indices, tuple):
+            samples, *axes = indices
+            if len(axes) > 2:
+                raise IndexError("PooledFeatureArray has 3 dimensions.")
+            if isinstance(samples, slice) and samples == slice(None) and all(isinstance(axis, slice) for axis in axes):
+                channels, times = (axes + [slice(None)] * 2)[:2]
+                return PooledFeatureArray(
+                    self.paths,
+                    _compose_slices(self.channels, channels, self._stored_shape[0]),
+                    _compose_slices(self.times, times, self._stored_shape[1])
+                )
+            return self[samples][(slice(None), *axes)]
+        if isinstance(indices, slice):
+            indices = np.arange(len(self))[indices]
+        indices = np.asarray(indices)
+        if indices.ndim == 0:
+            return self[indices[np.newaxis]][0]
+        sessions = np.searchsorted(self.offsets, indices, side='right') - 1
+        out = np.empty((len(indices),) + self.shape[1:], dtype=self.dtype)
+        for session in np.unique(sessions):
+            mask = sessions == session
+            out[mask] = self.arrays[session][indices[mask] - self.offsets[session]]
+        return out
+
+    def __getstate__(self):
+        return {"paths": self.paths, "channels": self.channels, "times": self.times}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
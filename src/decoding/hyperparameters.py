@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+
+from src.decoding.overt_covert_rest_model import OvertCoverRestClassifier
+import config as config
+
+
+# Hyperparameter names mapped to OvertCoverRestClassifier arguments
+MODEL_ARGUMENTS = {
+    "temporal_filters": "temporalFilters",
+    "temporal_kernel": "temporalKernel",
+    "spatial_filters": "spatialFilters",
+    "pool_size": "poolSize",
+    "dense_units": "denseUnits",
+    "dropout": "dropout"
+}
+# Hyperparameters a checkpoint's weights depend on (architecture and input length)
+CHECKPOINT_HYPERPARAMETERS = tuple(MODEL_ARGUMENTS) + ("time_window",)
+
+
+def resolve_hyperparameters(hyperparameters=None):
+    """
+    Completes a partial hyperparameter dict with config.DECODER_HYPERPARAMETERS.
+
+    Args:
+        hyperparameters (dict or None): Overrides, keyed like config.DECODER_HYPERPARAMETERS.
+
+    Returns:
+        dict: All decoder hyperparameters.
+    """
+    hyperparameters = dict(hyperparameters or {})
+    unknown = set(hyperparameters) - set(config.DECODER_HYPERPARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters: {sorted(unknown)}")
+    return {**config.DECODER_HYPERPARAMETERS, **hyperparameters}
+
+
+def crop_time_window(X, time_window):
+    """
+    Restricts epochs to the samples [start, stop) of the time axis. Slicing keeps
+    memory-mapped arrays memory-mapped and PooledFeatureArrays lazy.
+
+    Args:
+        X (array-like): Data of shape (n_samples, n_channels, n_times).
+        time_window (list or None): (start, stop) sample indices, or None for the whole epoch.
+
+    Returns:
+        array-like: A view of X.
+    """
+    if time_window is None:
+        return X
+    start, stop = time_window
+    return X[:, :, start:stop]
+
+
+def build_classifier(input_shape, hyperparameters=None):
+    """
+    Uncompiled OvertCoverRestClassifier with the architecture given by `hyperparameters`.
+
+    Args:
+        input_shape (tuple): (n_channels, n_times) after cropping.
+        hyperparameters (dict or None): See resolve_hyperparameters.
+
+    Returns:
+        OvertCoverRestClassifier: The classifier.
+    """
+    hyperparameters = resolve_hyperparameters(hyperparameters)
+    return OvertCoverRestClassifier(
+        inputShape=tuple(input_shape),
+        **{argument: hyperparameters[name] for name, argument in MODEL_ARGUMENTS.items()}
+    )
+
+
+def hyperparameters_path(checkpoint_path):
+    """JSON sidecar of a '.weights.h5' checkpoint, holding the hyperparameters it was trained with."""
+    checkpoint_path = Path(checkpoint_path)
+    return checkpoint_path.with_name(checkpoint_path.name.replace('.weights.h5', '') + '.hyperparameters.json')
+
+
+def save_hyperparameters(checkpoint_path, hyperparameters):
+    """
+    Writes the hyperparameters of a checkpoint next to it (see hyperparameters_path).
+    """
+    path = hyperparameters_path(checkpoint_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(resolve_hyperparameters(hyperparameters), indent=2))
+    return path
+
+
+def check_checkpoint_hyperparameters(checkpoint_path, hyperparameters):
+    """
+    Makes sure a checkpoint can be loaded into a classifier built with `hyperparameters`.
+    Checkpoints without a sidecar are not checked.
+
+    Raises:
+        ValueError: If the checkpoint was trained with another architecture or time window.
+    """
+    path = hyperparameters_path(checkpoint_path)
+    if not path.exists():
+        return
+    saved = json.loads(path.read_text())
+    requested = json.loads(json.dumps(resolve_hyperparameters(hyperparameters)))  # tuples as lists
+    mismatched = {
+        name: (saved.get(name), requested[name])
+        for name in CHECKPOINT_HYPERPARAMETERS if saved.get(name) != requested[name]
+    }
+    if mismatched:
+        raise ValueError(f"{checkpoint_path} was trained with other hyperparameters "
+                         f"(checkpoint, requested): {mismatched}")
@@ -0,0 +1,62 @@
+import numpy as np
+import tensorflow as tf
+
+
+def normalize_per_sample_per_channel(X, eps=1e-8):
+    """
+    In-graph equivalent of OvertCovertRestPipeline.normalizePerSamplePerChannel: z-scores
+    every (sample, channel) pair over time.
+
+    Args:
+        X (tf.Tensor): Batch of shape (batch, n_channels, n_times).
+        eps (float): Added to the standard deviation.
+
+    Returns:
+        tf.Tensor: Normalized batch.
+    """
+    mean, variance = tf.nn.moments(X, axes=[2], keepdims=True)
+    return (X - mean) / (tf.sqrt(variance) + eps)
+
+
+def make_dataset(X, y, indices, batch_size=128, shuffle=True, normalize=True, seed=42):
+    """
+    Builds a tf.data pipeline over a (possibly memory-mapped) epoch array: shuffles the
+    sample indices, gathers each batch from X in parallel, normalizes it inside the graph
+    and prefetches, so only a few batches are ever held in memory.
+
+    Args:
+        X (np.ndarray): Data of shape (n_samples, n_channels, n_times), e.g. a np.memmap.
+        y (np.ndarray): Labels of shape (n_samples,).
+        indices (np.ndarray): Sample indices (repeats allowed) making up one epoch.
+        batch_size (int): Batch size.
+        shuffle (bool): Whether to reshuffle the indices every epoch.
+        normalize (bool): Whether to apply per-sample per-channel normalization.
+        seed (int): Shuffle seed.
+
+    Returns:
+        tf.data.Dataset: Yields (X_batch float32, y_batch int64).
+    """
+    y = np.asarray(y, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    sample_shape = tuple(X.shape[1:])
+
+    def _gather(batch):
+        return np.asarray(X[batch], dtype=np.float32), y[batch]
+
+    def _load(batch):
+        X_batch, y_batch = tf.numpy_function(_gather, [batch], (tf.float32, tf.int64))
+        X_batch.set_shape((None,) + sample_shape)
+        y_batch.set_shape((None,))
+        if normalize:
+            X_batch = normalize_per_sample_per_channel(X_batch)
+        return X_batch, y_batch
+
+    dataset = tf.data.Dataset.from_tensor_slices(indices)
+    if shuffle:
+        dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    return (
+        dataset
+        .batch(batch_size)
+        .map(_load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+        .prefetch(tf.data.AUTOTUNE)
+    )
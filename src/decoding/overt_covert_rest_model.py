@@ -1,5 +1,6 @@
 import numpy as np
 import tensorflow as tf
+from pathlib import Path
 from tensorflow.keras import layers, models, metrics
 from tensorflow.keras.losses import SparseCategoricalCrossentropy
 from tensorflow.keras.optimizers import Adam
@@ -9,24 +10,39 @@ from tensorflow.keras.callbacks import EarlyStopping
 
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 
+from src.decoding.balancing import BALANCE_MODES, balanced_indices, class_weights
+from src.decoding.input_pipeline import make_dataset
+
 
 class OvertCoverRestClassifier(tf.keras.Model):
-    def __init__(self, inputShape, numClasses=3):
+    def __init__(self, inputShape, numClasses=3, temporalFilters=16, temporalKernel=10, spatialFilters=32,
+                 poolSize=4, denseUnits=128, dropout=0.5):
+        """
+        Args:
+            inputShape (tuple): (n_channels, n_times).
+            numClasses (int): Number of classes.
+            temporalFilters (int): Filters of the temporal convolution.
+            temporalKernel (int): Temporal kernel length in samples.
+            spatialFilters (int): Filters of the spatial (all-channel) convolution.
+            poolSize (int): Temporal max-pooling size.
+            denseUnits (int): Units of the hidden dense layer.
+            dropout (float): Dropout rate before the output layer.
+        """
         super(OvertCoverRestClassifier, self).__init__()
 
         self.model = models.Sequential([
             layers.Input(shape=inputShape),
             layers.Reshape((inputShape[0], inputShape[1], 1)),
 
-            layers.Conv2D(16, kernel_size=(1, 10), activation='relu', padding='same'),
+            layers.Conv2D(temporalFilters, kernel_size=(1, temporalKernel), activation='relu', padding='same'),
             layers.BatchNormalization(),
-            layers.Conv2D(32, kernel_size=(inputShape[0], 1), activation='relu', padding='valid'),
+            layers.Conv2D(spatialFilters, kernel_size=(inputShape[0], 1), activation='relu', padding='valid'),
             layers.BatchNormalization(),
-            layers.MaxPooling2D(pool_size=(1, 4)),
+            layers.MaxPooling2D(pool_size=(1, poolSize)),
 
             layers.Flatten(),
-            layers.Dense(128, activation='relu'),
-            layers.Dropout(0.5),
+            layers.Dense(denseUnits, activation='relu'),
+            layers.Dropout(dropout),
             layers.Dense(numClasses, activation='softmax')
         ])
 
@@ -37,25 +53,84 @@ class OvertCoverRestClassifier(tf.keras.Model):
         metrics=[metrics.SparseCategoricalAccuracy()]
     )
 
-    def trainWithSplit(self, X, y, validationSplit=0.2, epochs=50, batchSize=128, shuffle=True):
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y, test_size=validationSplit, stratify=y, random_state=42, shuffle=shuffle
+    def trainWithSplit(self, X, y, validationSplit=0.2, epochs=50, batchSize=128, shuffle=True,
+                       balance=None, normalize=False, patience=5, callbacks=None):
+        """
+        Trains on a stratified split of (X, y) and evaluates on the held-out part.
+
+        Args:
+            X (np.ndarray): Data of shape (n_samples, n_channels, n_times), possibly memory-mapped.
+                Batches are streamed from it through a tf.data pipeline.
+            y (np.ndarray): Labels of shape (n_samples,).
+            validationSplit (float): Held-out fraction.
+            epochs (int): Maximum number of epochs.
+            batchSize (int): Batch size.
+            shuffle (bool): Whether to shuffle before splitting and between epochs.
+            balance (str or None): None, 'oversample' (training indices resampled to equal
+                class counts) or 'class_weight' (inverse-frequency loss weights). Balancing
+                is applied to the training split only and never copies X.
+            normalize (bool): Whether to normalize each batch per sample and channel in the
+                input pipeline (for raw, e.g. memory-mapped, X).
+            patience (int): Early-stopping patience in epochs.
+            callbacks (list or None): Extra Keras callbacks, e.g. a sweep pruner.
+
+        Returns:
+            tuple: (accuracy, classification report dict, confusion matrix).
+        """
+        y = np.asarray(y)
+        train_idx, val_idx = train_test_split(
+            np.arange(len(y)), test_size=validationSplit, stratify=y, random_state=42, shuffle=shuffle
         )
+        return self.trainOnIndices(
+            X, y, train_idx, val_idx, epochs=epochs, batchSize=batchSize,
+            shuffle=shuffle, balance=balance, normalize=normalize, patience=patience, callbacks=callbacks
+        )
+
+    def trainOnIndices(self, X, y, train_idx, val_idx, test_idx=None, epochs=50, batchSize=128,
+                       shuffle=True, balance=None, normalize=False, patience=5, callbacks=None):
+        """
+        Trains on the samples `train_idx` of (X, y), early-stopping on `val_idx`, and evaluates
+        on `test_idx` (or on `val_idx` if not given), e.g. one cross-validation fold. See
+        trainWithSplit for the remaining arguments.
+
+        Returns:
+            tuple: (accuracy, classification report dict, confusion matrix over all classes of y).
+        """
+        if balance not in BALANCE_MODES:
+            raise ValueError("Invalid balance. Choose from None, 'oversample' or 'class_weight'.")
+        y = np.asarray(y)
+        train_idx = np.asarray(train_idx)
+        classWeight = None
+        if balance == 'oversample':
+            train_idx = train_idx[balanced_indices(y[train_idx])]
+        elif balance == 'class_weight':
+            classWeight = class_weights(y[train_idx])
+
+        self.trainSamples = len(train_idx)  # per epoch, after balancing
+        val_idx = np.sort(val_idx)
+        trainData = make_dataset(X, y, train_idx, batch_size=batchSize, shuffle=shuffle, normalize=normalize)
+        valData = make_dataset(X, y, val_idx, batch_size=batchSize, shuffle=False, normalize=normalize)
 
         earlyStop = EarlyStopping(
             monitor='val_loss',
-            patience=5,
+            patience=patience,
             restore_best_weights=True
         )
 
         history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
+            trainData,
+            validation_data=valData,
             epochs=epochs,
-            batch_size=batchSize,
-            callbacks=[earlyStop]
+            class_weight=classWeight,
+            callbacks=[earlyStop] + list(callbacks or [])
         )
-        y_pred_probs = self.model.predict(X_val)
+        if test_idx is None:
+            evalData, y_val = valData, y[val_idx]
+        else:
+            test_idx = np.sort(test_idx)
+            evalData = make_dataset(X, y, test_idx, batch_size=batchSize, shuffle=False, normalize=normalize)
+            y_val = y[test_idx]
+        y_pred_probs = self.model.predict(evalData)
         
         # If output is one-hot encoded, convert both y_val and y_pred to class labels
         if y_pred_probs.shape[-1] > 1:
@@ -67,10 +142,34 @@ class OvertCoverRestClassifier(tf.keras.Model):
 
         # Generate reports
         report = classification_report(y_val, y_pred, digits=4, output_dict=True)
-        conf_matrix = confusion_matrix(y_val, y_pred)
+        conf_matrix = confusion_matrix(y_val, y_pred, labels=np.unique(y))
         accuracy = accuracy_score(y_val, y_pred)
 
         return accuracy, report, conf_matrix
+    def saveWeights(self, filepath):
+        """
+        Saves the model weights (Keras requires the '.weights.h5' suffix).
+        """
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        self.model.save_weights(str(filepath))
+
+    def loadWeights(self, filepath):
+        """
+        Initializes the model from a checkpoint of the same architecture and input shape,
+        e.g. a pooled model or a previous session.
+        """
+        self.model.load_weights(str(filepath))
+
+    def freezeConvLayers(self, freeze=True):
+        """
+        Freezes (or unfreezes) the convolutional feature extractor, i.e. the Conv2D and
+        BatchNormalization layers, so fine-tuning only updates the dense head. Frozen batch
+        normalization layers also keep their running statistics. Call compileModel afterwards.
+        """
+        for layer in self.model.layers:
+            if isinstance(layer, (layers.Conv2D, layers.BatchNormalization)):
+                layer.trainable = not freeze
+
     def evaluate(self, testData):
         return self.model.evaluate(testData)
 
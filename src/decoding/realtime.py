@@ -0,0 +1,305 @@
+import time
+import numpy as np
+import pandas as pd
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+from src.utils.graphics import styled_print
+import config as config
+
+
+class RingBuffer:
+    """
+    Fixed-size multichannel sample buffer. Writes overwrite the oldest samples, so memory
+    stays constant however long the stream runs.
+    """
+    def __init__(self, n_channels, capacity):
+        self.data = np.zeros((n_channels, capacity), dtype=np.float32)
+        self.capacity = capacity
+        self.n_written = 0
+
+    def write(self, chunk):
+        """
+        Appends a chunk of shape (n_channels, n_samples).
+        """
+        n_total = chunk.shape[1]
+        chunk = chunk[:, -self.capacity:]  # older samples would be overwritten anyway
+        n = chunk.shape[1]
+        start = (self.n_written + n_total - n) % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[:, start:start + first] = chunk[:, :first]
+        self.data[:, :n - first] = chunk[:, first:]
+        self.n_written += n_total
+
+    def latest(self, n_samples):
+        """
+        Returns the last `n_samples` samples in time order, shape (n_channels, n_samples).
+        """
+        if n_samples > min(self.n_written, self.capacity):
+            raise ValueError("Not enough samples buffered.")
+        end = self.n_written % self.capacity
+        idx = np.arange(end - n_samples, end) % self.capacity
+        return self.data[:, idx]
+
+
+class CausalFilter:
+    """
+    Streaming Butterworth band-pass filter (second-order sections) carrying its state across
+    chunks, so filtering chunk by chunk equals filtering the whole recording causally.
+    """
+    def __init__(self, sfreq, l_freq=None, h_freq=None, order=4):
+        """
+        Args:
+            sfreq (float): Sampling frequency in Hz.
+            l_freq (float or None): High-pass edge. Defaults to config.EEG_FILTER['l_freq'].
+            h_freq (float or None): Low-pass edge. Defaults to config.EEG_FILTER['h_freq'].
+            order (int): Filter order.
+        """
+        l_freq = config.EEG_FILTER['l_freq'] if l_freq is None else l_freq
+        h_freq = config.EEG_FILTER['h_freq'] if h_freq is None else h_freq
+        h_freq = min(h_freq, 0.99 * sfreq / 2)
+        self.sos = butter(order, [l_freq, h_freq], btype='bandpass', fs=sfreq, output='sos')
+        self.zi = None
+
+    def process(self, chunk):
+        """
+        Filters a chunk of shape (n_channels, n_samples), continuing from the previous chunk.
+        """
+        if self.zi is None:
+            # Start in steady state for the first sample to avoid a step transient
+            self.zi = sosfilt_zi(self.sos)[:, np.newaxis, :] * chunk[np.newaxis, :, :1]
+        filtered, self.zi = sosfilt(self.sos, chunk, axis=-1, zi=self.zi)
+        return filtered.astype(np.float32)
+
+
+class ReplayStream:
+    """
+    Local stand-in for a live amplifier: replays an MNE Raw recording (a raw BIDS session
+    or an XDF EEG stream) in fixed-size chunks, paced at real-time speed.
+    """
+    def __init__(self, raw, picks=None, chunk_duration=None, realtime=True, tmin=0.0, tmax=None, reference=None):
+        """
+        Args:
+            raw (mne.io.Raw): Recording to replay.
+            picks (list or None): Channels to stream, in model order.
+            chunk_duration (float or None): Chunk length in seconds. Defaults to config.REALTIME_CHUNK_DURATION.
+            realtime (bool): Whether to sleep so chunks arrive at the recording's pace.
+            tmin (float): Replay start in seconds.
+            tmax (float or None): Replay end in seconds.
+            reference (list or None): Channels whose mean is subtracted from every chunk, as an
+                online re-reference (sample by sample, so still causal).
+        """
+        self.raw = raw
+        self.picks = picks
+        self.ch_names = list(picks) if picks is not None else raw.ch_names
+        self.sfreq = raw.info['sfreq']
+        chunk_duration = config.REALTIME_CHUNK_DURATION if chunk_duration is None else chunk_duration
+        self.chunk_size = max(1, int(round(chunk_duration * self.sfreq)))
+        self.realtime = realtime
+        self.start = int(round(tmin * self.sfreq))
+        self.stop = raw.n_times if tmax is None else min(raw.n_times, int(round(tmax * self.sfreq)))
+        self.reference = list(reference) if reference else None
+
+    @classmethod
+    def from_session(cls, sub_id, ses_id, channels=None, processed=False, **kwargs):
+        """
+        Replays a session as an amplifier would deliver it.
+
+        Args:
+            sub_id (str): BIDS subject identifier.
+            ses_id (str): BIDS session identifier.
+            channels (list or None): Channels to stream, in model order.
+            processed (bool): Replay the processed derivative instead of the raw recording. It is
+                already zero-phase band-passed, re-referenced and ICA-cleaned, which no online
+                signal is, so decode it with RealtimeDecoder(filter_kwargs=False).
+            **kwargs: Forwarded to ReplayStream. The raw recording is re-referenced to
+                config.EEG_REFERENCE unless `reference` is given.
+
+        Returns:
+            ReplayStream: The stream.
+        """
+        if processed:
+            from src.dataset.data_reader import BIDSDatasetReader
+            raw = BIDSDatasetReader(sub_id=sub_id, ses_id=ses_id, channels=channels).processed_file
+            return cls(raw, picks=channels, **kwargs)
+        from mne_bids import read_raw_bids
+        from src.dataset.data_reader import bids_path
+        raw = read_raw_bids(bids_path(sub_id, ses_id), verbose=False)
+        kwargs.setdefault("reference", config.EEG_REFERENCE)
+        return cls(raw, picks=channels, **kwargs)
+
+    def __iter__(self):
+        """
+        Yields (chunk of shape (n_channels, n_samples), arrival time from time.perf_counter()).
+        """
+        t0 = time.perf_counter()
+        for start in range(self.start, self.stop, self.chunk_size):
+            stop = min(start + self.chunk_size, self.stop)
+            if self.realtime:
+                delay = t0 + (stop - self.start) / self.sfreq - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            chunk = self.raw.get_data(picks=self.picks, start=start, stop=stop)
+            if self.reference is not None:
+                chunk = chunk - self.raw.get_data(picks=self.reference, start=start, stop=stop).mean(axis=0)
+            chunk = chunk.astype(np.float32)
+            yield chunk, time.perf_counter()
+
+
+class LSLStream:
+    """
+    Live EEG input from a Lab Streaming Layer outlet. Requires the optional `pylsl` package.
+    """
+    def __init__(self, stream_type='EEG', name=None, max_chunk=None, timeout=10.0):
+        """
+        Args:
+            stream_type (str): LSL stream type to resolve.
+            name (str or None): Stream name; the first stream of `stream_type` if None.
+            max_chunk (int or None): Maximum samples per pulled chunk.
+            timeout (float): Seconds to wait for the stream.
+        """
+        try:
+            import pylsl
+        except ImportError as e:
+            raise ImportError("LSLStream requires pylsl (pip install pylsl).") from e
+
+        streams = pylsl.resolve_byprop('name', name, timeout=timeout) if name else \
+            pylsl.resolve_byprop('type', stream_type, timeout=timeout)
+        if not streams:
+            raise RuntimeError(f"No LSL stream found (type={stream_type}, name={name}).")
+        self.inlet = pylsl.StreamInlet(streams[0], max_chunklen=max_chunk or 0)
+        info = self.inlet.info()
+        self.sfreq = info.nominal_srate()
+        self.n_channels = info.channel_count()
+
+    def __iter__(self):
+        while True:
+            samples, _ = self.inlet.pull_chunk(timeout=1.0)
+            if samples:
+                yield np.asarray(samples, dtype=np.float32).T, time.perf_counter()
+
+
+class RealtimeDecoder:
+    """
+    Sliding-window overt/covert/rest decoding of a chunked EEG stream: every chunk is
+    filtered causally (unless the input is already filtered) and written into a ring buffer, and every `step` seconds the latest
+    window is normalized per channel and classified. The latency of each window, from the
+    arrival of the chunk completing it to the prediction, is recorded.
+    """
+    def __init__(self, model, sfreq, n_channels, window_samples=None, step=None, filter_kwargs=None):
+        """
+        Args:
+            model: OvertCovertRestPredictor (recommended, low latency) or OvertCoverRestClassifier.
+            sfreq (float): Stream sampling frequency in Hz.
+            n_channels (int): Number of streamed channels (in model order).
+            window_samples (int or None): Window length in samples. Defaults to the model input length.
+            step (float or None): Seconds between decisions. Defaults to config.REALTIME_STEP.
+            filter_kwargs (dict, bool or None): CausalFilter options, None for its defaults
+                (config.EEG_FILTER), or False/{} to skip filtering of already filtered input.
+        """
+        self.model = model
+        self.sfreq = sfreq
+        if window_samples is None:
+            window_samples = self._model_input_shape()[1]
+        self.window_samples = window_samples
+        step = config.REALTIME_STEP if step is None else step
+        self.step_samples = max(1, int(round(step * sfreq)))
+        self.buffer = RingBuffer(n_channels, capacity=4 * window_samples)
+        if filter_kwargs is None:
+            self.filter = CausalFilter(sfreq)
+        else:
+            self.filter = CausalFilter(sfreq, **filter_kwargs) if filter_kwargs else None
+        self.decisions = []
+        self._next_decision = window_samples
+
+    def _model_input_shape(self):
+        if hasattr(self.model, 'metadata'):
+            return self.model.metadata['input_shape']
+        return self.model.model.input_shape[1:]
+
+    def _predict_proba(self, window):
+        window = (window - window.mean(axis=1, keepdims=True)) / (window.std(axis=1, keepdims=True) + 1e-8)
+        if hasattr(self.model, 'predict_one'):
+            return self.model.predict_one(window)
+        return np.asarray(self.model.predict(window[np.newaxis]))[0]
+
+    def push(self, chunk, arrival=None):
+        """
+        Feeds one chunk and classifies every window completed by it.
+
+        Args:
+            chunk (np.ndarray): Samples of shape (n_channels, n_samples).
+            arrival (float or None): time.perf_counter() when the chunk was received.
+
+        Returns:
+            list: Decisions made for this chunk, dicts with sample, time, label, probabilities and latency_ms.
+        """
+        arrival = time.perf_counter() if arrival is None else arrival
+        self.buffer.write(chunk if self.filter is None else self.filter.process(chunk))
+
+        decisions = []
+        while self.buffer.n_written >= self._next_decision:
+            lag = self.buffer.n_written - self._next_decision
+            end = self._next_decision
+            if self.window_samples + lag > self.buffer.capacity:
+                self._next_decision += self.step_samples  # window already overwritten by a huge chunk
+                continue
+            window = self.buffer.latest(self.window_samples + lag)[:, :self.window_samples]
+            probabilities = self._predict_proba(window)
+            decisions.append({
+                "sample": end,
+                "time": end / self.sfreq,
+                "label": int(np.argmax(probabilities)),
+                "probabilities": probabilities,
+                "latency_ms": (time.perf_counter() - arrival) * 1e3
+            })
+            self._next_decision += self.step_samples
+        self.decisions.extend(decisions)
+        return decisions
+
+    def run(self, stream, duration=None, callback=None):
+        """
+        Decodes a stream until it ends or `duration` seconds of signal have been processed.
+
+        Args:
+            stream (iterable): Yields (chunk, arrival_time), e.g. ReplayStream or LSLStream.
+            duration (float or None): Maximum seconds of signal.
+            callback (callable or None): Called with each decision dict.
+
+        Returns:
+            pd.DataFrame: One row per decision.
+        """
+        styled_print('', 'Starting real-time decoding', color='green')
+        for chunk, arrival in stream:
+            for decision in self.push(chunk, arrival):
+                if callback is not None:
+                    callback(decision)
+            if duration is not None and self.buffer.n_written >= duration * self.sfreq:
+                break
+        return self.decisions_frame()
+
+    def decisions_frame(self):
+        return pd.DataFrame([
+            {k: v for k, v in decision.items() if k != "probabilities"} for decision in self.decisions
+        ])
+
+    def latency_report(self):
+        """
+        Summary of the per-window latencies.
+
+        Returns:
+            dict: n_windows, mean, p50, p95, p99 and max latency in milliseconds.
+        """
+        latency = np.array([decision["latency_ms"] for decision in self.decisions])
+        if latency.size == 0:
+            return {"n_windows": 0}
+        report = {
+            "n_windows": int(latency.size),
+            "mean_ms": float(latency.mean()),
+            "p50_ms": float(np.percentile(latency, 50)),
+            "p95_ms": float(np.percentile(latency, 95)),
+            "p99_ms": float(np.percentile(latency, 99)),
+            "max_ms": float(latency.max())
+        }
+        styled_print('', f"Window latency: p50 {report['p50_ms']:.2f} ms, p95 {report['p95_ms']:.2f} ms, "
+                         f"max {report['max_ms']:.2f} ms over {report['n_windows']} windows", color='cyan')
+        return report
@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import hashlib
+import multiprocessing
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from pathlib import Path
+from sklearn.model_selection import ParameterGrid, ParameterSampler, train_test_split
+
+from src.decoding.cross_validation import _limit_threads, _shared_array
+from src.decoding.hyperparameters import resolve_hyperparameters, crop_time_window, build_classifier
+from src.utils.parallel import run_per_session
+from src.utils.graphics import styled_print
+import config as config
+
+
+def sample_trials(space, n_trials=None, random_state=42):
+    """
+    Hyperparameter combinations to evaluate.
+
+    Args:
+        space (dict): Values to try per hyperparameter, e.g. {"dropout": [0.25, 0.5]}.
+        n_trials (int or None): Number of combinations sampled without replacement, or None
+            for the full grid.
+        random_state (int): Sampling seed.
+
+    Returns:
+        list: One dict per trial.
+    """
+    grid = ParameterGrid(space)
+    if n_trials is None or n_trials >= len(grid):
+        return list(grid)
+    return list(ParameterSampler(space, n_iter=n_trials, random_state=random_state))
+
+
+class TrialCache:
+    """
+    One JSON record per finished trial, named after a hash of everything that determines
+    its result, so an interrupted sweep resumes where it stopped and completed trials feed
+    the median pruner of running ones. Records also hold the hash of their sweep (data,
+    split, defaults and training options), as other sweeps may share the directory.
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(**identity):
+        return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def load(self, key):
+        path = Path(self.directory, f"{key}.json")
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def save(self, key, record):
+        tmp = Path(self.directory, f"{key}.tmp")
+        tmp.write_text(json.dumps(record, indent=2, default=str))
+        os.replace(tmp, Path(self.directory, f"{key}.json"))
+
+    def records(self, status=None, sweep=None):
+        records = [json.loads(path.read_text()) for path in self.directory.glob("*.json")]
+        return [
+            record for record in records
+            if (status is None or record["status"] == status) and (sweep is None or record.get("sweep") == sweep)
+        ]
+
+
+class MedianPruner(tf.keras.callbacks.Callback):
+    """
+    Stops a trial once its best validation loss so far is worse than the median of the
+    completed trials' best validation loss at the same epoch, among the trials of the same sweep.
+    """
+    def __init__(self, cache, sweep=None, min_trials=None, warmup_epochs=None, monitor='val_loss'):
+        """
+        Args:
+            cache (TrialCache): Sweep cache holding the completed trials' curves.
+            sweep (str or None): Sweep hash (see run_sweep) the reference trials must share,
+                or None for every completed trial in the cache.
+            min_trials (int or None): Completed trials needed before pruning. Defaults to config.DECODER_SWEEP_MIN_TRIALS.
+            warmup_epochs (int or None): Epochs never pruned. Defaults to config.DECODER_SWEEP_WARMUP_EPOCHS.
+            monitor (str): Validation metric to minimize.
+        """
+        super().__init__()
+        self.cache = cache
+        self.sweep = sweep
+        self.min_trials = config.DECODER_SWEEP_MIN_TRIALS if min_trials is None else min_trials
+        self.warmup_epochs = config.DECODER_SWEEP_WARMUP_EPOCHS if warmup_epochs is None else warmup_epochs
+        self.monitor = monitor
+        self.curve = []
+        self.pruned_epoch = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.curve.append(float(logs[self.monitor]))
+        if len(self.curve) <= self.warmup_epochs:
+            return
+        # Best value of every completed curve up to this epoch (its final best if it stopped earlier)
+        reference = [min(record["curve"][:epoch + 1]) for record in self.cache.records(status='complete', sweep=self.sweep)]
+        if len(reference) >= self.min_trials and min(self.curve) > np.median(reference):
+            self.pruned_epoch = epoch + 1
+            self.model.stop_training = True
+
+
+def _pin_worker(n_threads, slots):
+    """
+    Worker initializer: claims the next free slot, pins the process to its own
+    `n_threads` cores (where the platform supports affinity) and caps its thread pools.
+    """
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    if hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cores[(slot * n_threads + i) % len(cores)] for i in range(n_threads)})
+    _limit_threads(n_threads)
+
+
+class _TrialTask:
+    """Picklable worker training one hyperparameter combination and caching its record."""
+    def __init__(self, source, y, train_idx, val_idx, cache_dir, sweep, pruning, train_kwargs):
+        self.source = source
+        self.y = y
+        self.train_idx = train_idx
+        self.val_idx = val_idx
+        self.cache_dir = cache_dir
+        self.sweep = sweep
+        self.pruning = pruning
+        self.train_kwargs = train_kwargs
+
+    def __call__(self, key, params):
+        X = np.load(self.source, mmap_mode='r') if isinstance(self.source, str) else self.source
+        hyperparameters = resolve_hyperparameters(params)
+        X = crop_time_window(X, hyperparameters["time_window"])
+        cache = TrialCache(self.cache_dir)
+        pruner = MedianPruner(cache, self.sweep, warmup_epochs=None if self.pruning else np.inf)
+
+        start = time.perf_counter()
+        model = build_classifier(X.shape[1:], hyperparameters)
+        model.compileModel(learningRate=hyperparameters["learning_rate"])
+        accuracy, report, _ = model.trainOnIndices(
+            X, self.y, self.train_idx, self.val_idx, batchSize=hyperparameters["batch_size"],
+            callbacks=[pruner], **self.train_kwargs
+        )
+        record = {
+            "trial": key,
+            "sweep": self.sweep,
+            "params": params,
+            "status": "pruned" if pruner.pruned_epoch else "complete",
+            "accuracy": float(accuracy),
+            "macro_f1": float(report["macro avg"]["f1-score"]),
+            "best_val_loss": min(pruner.curve),
+            "epochs": len(pruner.curve),
+            "fit_seconds": time.perf_counter() - start,
+            "curve": pruner.curve
+        }
+        cache.save(key, record)
+        return record
+
+
+def holdout_split(y, validation_split=0.2, test_split=0.2, random_state=42):
+    """
+    Stratified train/validation/test indices. run_sweep early-stops, prunes, scores and
+    selects trials on the validation part only, so the test part gives an unbiased accuracy
+    of the selected configuration.
+
+    Args:
+        y (np.ndarray): Labels of shape (n_samples,).
+        validation_split (float): Validation fraction of the samples left after the test split.
+        test_split (float): Held-out test fraction.
+        random_state (int): Seed of the splits.
+
+    Returns:
+        tuple: (train_idx, val_idx, test_idx).
+    """
+    y = np.asarray(y)
+    rest_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=test_split, stratify=y, random_state=random_state
+    )
+    train_idx, val_idx = train_test_split(
+        rest_idx, test_size=validation_split, stratify=y[rest_idx], random_state=random_state
+    )
+    return train_idx, val_idx, test_idx
+
+
+def run_sweep(X, y, space=None, n_trials=None, cache_dir=None, data_key='', validation_split=0.2,
+              test_split=0.2, random_state=42, pruning=True, max_workers=None, threads_per_worker=None,
+              **train_kwargs):
+    """
+    Hyperparameter sweep of OvertCoverRestClassifier. Trials run concurrently in spawned
+    processes, each pinned to its own `threads_per_worker` cores, on one stratified
+    train/validation split shared by all trials. The test part of holdout_split is never
+    seen by the sweep and is left for evaluating the selected configuration. Unpromising
+    trials are pruned by MedianPruner, and every finished trial is cached under `cache_dir`, so rerunning an
+    interrupted sweep only trains the missing trials.
+
+    Args:
+        X (np.ndarray): Data of shape (n_samples, n_channels, n_times), possibly memory-mapped.
+        y (np.ndarray): Labels of shape (n_samples,).
+        space (dict or None): Search space (see sample_trials). Defaults to config.DECODER_SWEEP_SPACE.
+        n_trials (int or None): Sampled trials, or None for the full grid. Defaults to config.DECODER_SWEEP_TRIALS.
+        cache_dir (str or Path or None): Trial cache directory. Defaults to DecodingResults/sweeps.
+        data_key (str): Identifies X and y in the trial hashes, e.g. the feature-store key.
+        validation_split (float): Validation fraction of the non-test samples, used for early
+            stopping, pruning and scoring.
+        test_split (float): Fraction held out of the sweep (see holdout_split).
+        random_state (int): Seed of the splits and of the trial sampling.
+        pruning (bool): Whether to prune trials early.
+        max_workers (int or None): Number of concurrent trials. Defaults to config.MAX_WORKERS.
+        threads_per_worker (int or None): Cores per trial. Defaults to config.THREADS_PER_WORKER.
+        **train_kwargs: Forwarded to trainOnIndices (e.g. epochs, patience, balance, normalize).
+
+    Returns:
+        pd.DataFrame: One row per trial (hyperparameters, status, metrics, epochs and timing),
+            best validation accuracy first.
+    """
+    space = config.DECODER_SWEEP_SPACE if space is None else space
+    n_trials = config.DECODER_SWEEP_TRIALS if n_trials is None else n_trials
+    cache_dir = Path(config.CURR_DIR, 'DecodingResults', 'sweeps') if cache_dir is None else cache_dir
+    threads_per_worker = config.THREADS_PER_WORKER if threads_per_worker is None else threads_per_worker
+    cache = TrialCache(cache_dir)
+    y = np.asarray(y)
+    train_idx, val_idx, _ = holdout_split(y, validation_split, test_split, random_state)
+
+    # Identifies the trials comparable with this sweep's, for resuming and for pruning
+    sweep = TrialCache.key(
+        data=data_key, defaults=config.DECODER_HYPERPARAMETERS,
+        split=[validation_split, test_split, random_state], pruning=pruning, train_kwargs=train_kwargs
+    )
+    trials = {TrialCache.key(sweep=sweep, params=params): params
+              for params in sample_trials(space, n_trials, random_state)}
+    records = {key: cache.load(key) for key in trials}
+    pending = [(key, params) for key, params in trials.items() if records[key] is None]
+    styled_print('', f'Sweep: {len(trials)} trials, {len(trials) - len(pending)} cached', color='green')
+
+    if pending:
+        context = multiprocessing.get_context('spawn')
+        with _shared_array(X) as source:
+            results, errors = run_per_session(
+                _TrialTask(source, y, train_idx, val_idx, str(cache_dir), sweep, pruning, train_kwargs), pending,
+                max_workers=max_workers, backend='process',
+                initializer=_pin_worker, initargs=(threads_per_worker, context.Value('i', 0)),
+                mp_context=context
+            )
+        records.update(results)
+        for key, e in errors.items():
+            styled_print('', f'Trial {trials[key]} failed: {e}', color='red')
+
+    rows = [
+        {"trial": key, **record["params"], **{k: v for k, v in record.items() if k not in ("trial", "sweep", "params", "curve")}}
+        for key, record in records.items() if record is not None
+    ]
+    if not rows:
+        raise RuntimeError("All trials failed.")
+    results = pd.DataFrame(rows)
+    results["completed"] = results["status"] == "complete"
+    results = results.sort_values(["completed", "accuracy"], ascending=False).drop(columns="completed")
+    return results.reset_index(drop=True)
+
+
+def best_hyperparameters(results):
+    """
+    Hyperparameters of the most accurate completed trial of run_sweep.
+
+    Returns:
+        dict: Hyperparameters, keyed like config.DECODER_HYPERPARAMETERS.
+    """
+    completed = results[results["status"] == "complete"]
+    if completed.empty:
+        raise ValueError("No completed trial.")
+    best = completed.iloc[0]
+    return {
+        name: best[name].item() if isinstance(best[name], np.generic) else best[name]
+        for name in config.DECODER_HYPERPARAMETERS if name in best.index
+    }
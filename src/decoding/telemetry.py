@@ -0,0 +1,163 @@
+import time
+import pickle
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from pathlib import Path
+
+from src.decoding.input_pipeline import normalize_per_sample_per_channel
+import config as config
+
+
+TELEMETRY_SUFFIX = "_overt_covert_rest_telemetry.csv"
+
+
+class EpochTelemetry(tf.keras.callbacks.Callback):
+    """
+    Records the wall time and losses of every training epoch and the total fit time,
+    including the epochs run before early stopping. The validation pass at the end of each
+    epoch is timed separately, so fit_seconds covers the training steps only.
+    """
+    def on_train_begin(self, logs=None):
+        self.epochs = []
+        self._train_start = time.perf_counter()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._validation_seconds = 0.0
+
+    def on_test_begin(self, logs=None):
+        self._validation_start = time.perf_counter()
+
+    def on_test_end(self, logs=None):
+        self._validation_seconds += time.perf_counter() - self._validation_start
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        seconds = time.perf_counter() - self._epoch_start
+        self.epochs.append({
+            "epoch": epoch + 1,
+            "seconds": seconds,
+            "fit_seconds": seconds - self._validation_seconds,
+            "loss": logs.get("loss"),
+            "val_loss": logs.get("val_loss")
+        })
+
+    def on_train_end(self, logs=None):
+        self.train_seconds = time.perf_counter() - self._train_start
+
+    def epochs_frame(self, n_samples):
+        """
+        Per-epoch telemetry.
+
+        Args:
+            n_samples (int): Training samples per epoch.
+
+        Returns:
+            pd.DataFrame: epoch, seconds (including validation), fit_seconds, training
+                samples_per_second, loss and val_loss.
+        """
+        epochs = pd.DataFrame(self.epochs, columns=["epoch", "seconds", "fit_seconds", "loss", "val_loss"])
+        epochs.insert(3, "samples_per_second", n_samples / epochs["fit_seconds"])
+        return epochs
+
+
+def model_size(classifier):
+    """
+    Number of parameters and their in-memory size of a trained decoder.
+
+    Args:
+        classifier: OvertCoverRestClassifier or CovarianceClassifier.
+
+    Returns:
+        dict: n_parameters and parameter_bytes.
+    """
+    if hasattr(classifier, "classifier"):  # CovarianceClassifier: spatial transform and linear model
+        arrays = [value for value in vars(classifier.features).values() if isinstance(value, np.ndarray)]
+        arrays += [step_array for step in classifier.classifier.named_steps.values()
+                   for step_array in vars(step).values() if isinstance(step_array, np.ndarray)]
+        return {
+            "n_parameters": int(sum(array.size for array in arrays)),
+            "parameter_bytes": len(pickle.dumps((classifier.features, classifier.classifier)))
+        }
+    return {
+        "n_parameters": int(classifier.model.count_params()),
+        "parameter_bytes": int(sum(np.asarray(weight).nbytes for weight in classifier.model.weights))
+    }
+
+
+def inference_latency(classifier, X, batch_size=None, n_runs=None, warmup=5, normalize=False):
+    """
+    Wall time of predicting a single batch, as a deployed decoder would: the CNN is called
+    directly instead of through Keras predict, whose per-call setup dominates small batches.
+
+    Args:
+        classifier: OvertCoverRestClassifier, CovarianceClassifier or OvertCovertRestPredictor.
+        X (array-like): Data of shape (n_samples, n_channels, n_times), as given to the model.
+        batch_size (int or None): Epochs per batch. Defaults to config.TELEMETRY_LATENCY_BATCH_SIZE.
+        n_runs (int or None): Timed repetitions. Defaults to config.TELEMETRY_LATENCY_RUNS.
+        warmup (int): Untimed repetitions first (graph tracing, allocations).
+        normalize (bool): Whether the decoder normalizes its input per sample and channel, as
+            when it was trained with normalize=True; the normalization is then timed too.
+
+    Returns:
+        dict: Latency batch size, mean, p50 and p95 in milliseconds.
+    """
+    batch_size = config.TELEMETRY_LATENCY_BATCH_SIZE if batch_size is None else batch_size
+    n_runs = config.TELEMETRY_LATENCY_RUNS if n_runs is None else n_runs
+    batch = np.ascontiguousarray(X[np.arange(min(batch_size, len(X)))], dtype=np.float32)
+    if hasattr(classifier, "classifier"):  # CovarianceClassifier
+        predict = lambda inputs: classifier.predict_proba(inputs, normalize=normalize)
+    elif hasattr(classifier, "predict_proba"):  # OvertCovertRestPredictor, normalizes in graph
+        predict = classifier.predict_proba
+    elif normalize:
+        predict = lambda inputs: classifier.model(normalize_per_sample_per_channel(inputs), training=False)
+    else:
+        predict = lambda inputs: classifier.model(inputs, training=False)
+
+    for _ in range(warmup):
+        np.asarray(predict(batch))
+    latency = np.empty(n_runs)
+    for i in range(n_runs):
+        start = time.perf_counter()
+        np.asarray(predict(batch))
+        latency[i] = (time.perf_counter() - start) * 1e3
+    return {
+        "latency_batch_size": len(batch),
+        "latency_mean_ms": float(latency.mean()),
+        "latency_p50_ms": float(np.percentile(latency, 50)),
+        "latency_p95_ms": float(np.percentile(latency, 95))
+    }
+
+
+def summarize_telemetry(output_dir=None):
+    """
+    Collects the per-session telemetry files of a results directory and summarizes them
+    across the cohort.
+
+    Args:
+        output_dir (str or Path or None): Directory of the session telemetry CSVs.
+            Defaults to DecodingResults.
+
+    Returns:
+        tuple: (sessions, one row per session; summary, mean/std/min/max of every numeric
+            column per decoder backend and evaluation mode ('holdout' training or 'cv'), or
+            (None, None) if no telemetry was found.
+    """
+    output_dir = Path(config.CURR_DIR, 'DecodingResults') if output_dir is None else Path(output_dir)
+    files = sorted(output_dir.glob(f"sub-*{TELEMETRY_SUFFIX}"))
+    if not files:
+        return None, None
+    sessions = pd.concat([pd.read_csv(path, dtype={"subject_id": str, "session_id": str}) for path in files],
+                         ignore_index=True)
+    if "evaluation" not in sessions:
+        sessions["evaluation"] = "holdout"
+    summaries = []
+    for (backend, evaluation), group in sessions.groupby(["backend", "evaluation"], sort=False):
+        numeric = group.select_dtypes(include="number").dropna(axis=1, how="all")
+        summary = numeric.agg(["mean", "std", "min", "max"]).transpose().reset_index(names="metric")
+        summary.insert(0, "backend", backend)
+        summary.insert(1, "evaluation", evaluation)
+        summary["n_sessions"] = numeric.notna().sum().values
+        summaries.append(summary)
+    return sessions, pd.concat(summaries, ignore_index=True)
@@ -0,0 +1,152 @@
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import config as config
+from src.pipelines.overt_covert_rest_pipeline import OvertCovertRestPipeline
+from src.decoding.feature_store import DecodingFeatureStore
+from src.decoding.export import export_classifier, export_path
+from src.decoding.cross_validation import leave_one_subject_out
+from src.decoding.hyperparameters import (resolve_hyperparameters, crop_time_window, build_classifier,
+                                          save_hyperparameters)
+from src.utils.parallel import run_per_session, report_errors
+
+
+class GroupDecodingPipeline:
+    """
+    Pools the overt/covert/rest epochs of many sessions into one training set, evaluates
+    generalization to unseen participants with leave-one-subject-out folds and trains one
+    pooled model on the whole cohort.
+
+    The sessions stay memory-mapped in the feature store; folds read only the epochs of
+    their batches, so the cohort is never held in memory at once.
+    """
+    def __init__(self, sessions, balance='oversample', val_fraction=0.1, max_workers=None, hyperparameters=None):
+        """
+        Args:
+            sessions (list): (subject_id, session_id) pairs.
+            balance (str or None): Class balancing of the training samples: 'oversample',
+                'class_weight' or None.
+            val_fraction (float): Fraction of the training samples used for early stopping.
+            max_workers (int or None): Number of concurrent folds. Defaults to config.MAX_WORKERS.
+            hyperparameters (dict or None): CNN hyperparameters overriding config.DECODER_HYPERPARAMETERS,
+                used by both the leave-one-subject-out folds and the pooled model.
+        """
+        self.sessions = [tuple(session) for session in sessions]
+        self.balance = balance
+        self.val_fraction = val_fraction
+        self.max_workers = max_workers
+        self.hyperparameters = resolve_hyperparameters(hyperparameters)
+        self.feature_store = DecodingFeatureStore()
+        self.output_dir = Path(config.CURR_DIR, 'DecodingResults')
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Starting point for per-session fine-tuning (OvertCovertRestPipeline(init_checkpoint=...))
+        self.checkpoint_path = Path(self.output_dir, 'models', 'group_overt_covert_rest.weights.h5')
+        self.model = None
+        self.loso_results = None
+
+    def load_data(self):
+        """
+        Makes sure every session is in the feature store and pools them lazily. Sessions
+        that fail to load are skipped.
+        """
+        def _session_labels(key, _):
+            sub_id, ses_id = key
+            _, y = OvertCovertRestPipeline(subject_id=sub_id, session_id=ses_id).load_features()
+            return np.asarray(y)
+
+        labels, errors = run_per_session(_session_labels, [(session, None) for session in self.sessions])
+        report_errors(errors)
+        self.sessions = list(labels)
+        if not self.sessions:
+            raise ValueError("No session could be loaded for group decoding.")
+
+        self.X = self.feature_store.pooled(self.sessions, channels=slice(None, 200))
+        self.y = np.concatenate(list(labels.values()))
+        self.groups = np.concatenate([np.full(len(y), sub_id) for (sub_id, _), y in labels.items()])
+
+        print(f"Pooled data: {self.X.shape[0]} samples from {len(self.sessions)} sessions, "
+              f"{len(np.unique(self.groups))} subjects")
+        return self
+
+    def evaluate_loso(self):
+        """
+        Leave-one-subject-out evaluation of the decoder.
+
+        Returns:
+            dict: Fold metrics, summary and confusion matrices (see leave_one_subject_out).
+        """
+        self.loso_results = leave_one_subject_out(
+            self.X, self.y, self.groups, val_fraction=self.val_fraction,
+            max_workers=self.max_workers, hyperparameters=self.hyperparameters,
+            balance=self.balance, normalize=True
+        )
+        summary = self.loso_results["summary"].set_index("metric")
+        print(f"Leave-one-subject-out accuracy: {summary.loc['accuracy', 'mean']:.4f} "
+              f"± {summary.loc['accuracy', 'std']:.4f}")
+        return self.loso_results
+
+    def train(self):
+        """
+        Trains one pooled model on all sessions, early-stopping on a stratified validation split.
+        """
+        X = crop_time_window(self.X, self.hyperparameters["time_window"])
+        self.model = build_classifier(X.shape[1:], self.hyperparameters)
+        self.model.compileModel(learningRate=self.hyperparameters["learning_rate"])
+        self.accuracy, self.report, self.confusion_matrix = self.model.trainWithSplit(
+            X, self.y, validationSplit=self.val_fraction, balance=self.balance, normalize=True,
+            batchSize=self.hyperparameters["batch_size"]
+        )
+        print("Pooled training completed.")
+
+    def export(self, quantization=None, fmt='tflite'):
+        """
+        Exports the trained model next to its weights for inference with OvertCovertRestPredictor.
+
+        Args:
+            quantization (str or None): None, 'float16' or 'int8' (TFLite only).
+            fmt (str): 'tflite' or 'savedmodel'.
+
+        Returns:
+            Path: The exported model.
+        """
+        time_window = self.hyperparameters["time_window"]
+        return export_classifier(
+            self.model, export_path(self.checkpoint_path, quantization, fmt), quantization=quantization,
+            representative_data=crop_time_window(self.X, time_window), time_window=time_window
+        )
+
+    def save_results(self):
+        prefix = "group_overt_covert_rest"
+        if self.loso_results is not None:
+            folds_path = Path(self.output_dir, f"{prefix}_loso_folds.csv")
+            self.loso_results["folds"].to_csv(folds_path, index=False)
+            self.loso_results["summary"].to_csv(Path(self.output_dir, f"{prefix}_loso_summary.csv"), index=False)
+            pd.DataFrame(self.loso_results["confusion_matrix"]).to_csv(
+                Path(self.output_dir, f"{prefix}_loso_confusion_matrix.csv"), index=False
+            )
+            print(f"Leave-one-subject-out results saved to {folds_path}")
+
+        if self.model is not None:
+            acc_path = Path(self.output_dir, f"{prefix}_accuracy.csv")
+            pd.DataFrame({'accuracy': [self.accuracy]}).to_csv(acc_path, index=False)
+            pd.DataFrame(self.report).transpose().to_csv(Path(self.output_dir, f"{prefix}_classification_report.csv"))
+            pd.DataFrame(self.confusion_matrix).to_csv(
+                Path(self.output_dir, f"{prefix}_confusion_matrix.csv"), index=False
+            )
+            print(f"Pooled model results saved to {acc_path}")
+            self.model.saveWeights(self.checkpoint_path)
+            save_hyperparameters(self.checkpoint_path, self.hyperparameters)
+            print(f"Pooled model weights saved to {self.checkpoint_path}")
+
+    def run(self, loso=True, pooled=True):
+        if not config.OVERT_COVERT_REST_GROUP_DECODING:
+            print("Pipeline not enabled in config.")
+            return
+        self.load_data()
+        if loso:
+            self.evaluate_loso()
+        if pooled:
+            self.train()
+        self.save_results()
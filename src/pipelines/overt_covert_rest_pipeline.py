@@ -1,22 +1,67 @@
 import os
+import time
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from imblearn.over_sampling import RandomOverSampler  # NEW: For oversampling
 
 import config as config
 from src.decoding.overt_covert_rest import SpeechEEGDatasetLoader
-from src.decoding.overt_covert_rest_model import OvertCoverRestClassifier
+from src.decoding.covariance_model import CovarianceClassifier
+from src.decoding.feature_store import DecodingFeatureStore, feature_key
+from src.decoding.export import export_classifier, export_path
+from src.decoding.cross_validation import cross_validate
+from src.decoding.hyperparameters import (resolve_hyperparameters, crop_time_window, build_classifier,
+                                          save_hyperparameters, check_checkpoint_hyperparameters)
+from src.decoding.sweep import run_sweep, best_hyperparameters, holdout_split
+from src.decoding.telemetry import EpochTelemetry, model_size, inference_latency
 
 
 class OvertCovertRestPipeline:
-    def __init__(self, subject_id='01', session_id='01'):
+    def __init__(self, subject_id='01', session_id='01', use_feature_store=True, balance='oversample',
+                 streaming=False, init_checkpoint=None, freeze_conv=False, backend='cnn', hyperparameters=None):
+        """
+        Args:
+            subject_id (str): Subject ID.
+            session_id (str): Session ID.
+            use_feature_store (bool): Whether to reuse the stored epoch tensor of the session
+                instead of re-epoching the raw EEG.
+            balance (str or None): Class balancing of the training split: 'oversample'
+                (resampled batch indices), 'class_weight' or None.
+            streaming (bool): If True, X stays memory-mapped in the feature store and is
+                normalized batch by batch in the tf.data input pipeline instead of in memory.
+            init_checkpoint (str or Path or None): Weights to start from, e.g. the pooled group
+                model. The model is then fine-tuned with config.DECODER_FINE_TUNE. Its architecture
+                and time window must match `hyperparameters` (checked against its hyperparameter sidecar).
+            freeze_conv (bool): Whether to freeze the convolutional layers when fine-tuning.
+            backend (str): 'cnn' (OvertCoverRestClassifier) or 'covariance' (CovarianceClassifier,
+                tangent-space features and logistic regression, trains in seconds).
+            hyperparameters (dict or None): CNN hyperparameters overriding config.DECODER_HYPERPARAMETERS.
+        """
+        if backend not in ('cnn', 'covariance'):
+            raise ValueError("Invalid backend. Choose from 'cnn' or 'covariance'.")
+        if backend != 'cnn' and (init_checkpoint is not None or freeze_conv):
+            raise ValueError("init_checkpoint and freeze_conv are only supported by the 'cnn' backend.")
         self.subject_id = subject_id
         self.session_id = session_id
+        self.feature_store = DecodingFeatureStore() if use_feature_store else None
+        self.balance = balance
+        self.streaming = streaming
+        self.init_checkpoint = init_checkpoint
+        self.freeze_conv = freeze_conv
+        self.backend = backend
+        self.hyperparameters = resolve_hyperparameters(hyperparameters)
         self.output_dir = Path(config.CURR_DIR, 'DecodingResults')
         os.makedirs(self.output_dir, exist_ok=True)
+        checkpoint_name = f"sub-{subject_id}_ses-{session_id}_overt_covert_rest" + \
+            ('.weights.h5' if backend == 'cnn' else '_covariance.pkl')
+        self.checkpoint_path = Path(self.output_dir, 'models', checkpoint_name)
         self.model = None
         self.history = None
+        self.cv_results = None
+        self.sweep_results = None
+        self.holdout = None  # (train, val, test) indices after a sweep
+        self.telemetry = {}
+        self.epoch_telemetry = None
 
     def _get_condition_config(self, trial_mode, trial_type):
         return {
@@ -39,52 +84,257 @@ class OvertCovertRestPipeline:
         )
         return loader.get_data()
 
-    def load_data(self):
-        overt_cfg = self._get_condition_config('Real', 'Speech')
-        covert_cfg = self._get_condition_config('Silent', 'Speech')
-        rest_cfg = self._get_condition_config('', 'Fixation')
+    def _condition_configs(self):
+        return [
+            (0, self._get_condition_config('Real', 'Speech')),    # overt
+            (1, self._get_condition_config('Silent', 'Speech')),  # covert
+            (2, self._get_condition_config('', 'Fixation'))       # rest
+        ]
 
-        overt, overt_labels = self._load_condition_data(0, overt_cfg)
-        covert, covert_labels = self._load_condition_data(1, covert_cfg)
-        rest, rest_labels = self._load_condition_data(2, rest_cfg)
+    def _build_features(self):
+        """
+        Epochs every condition from the EEG and concatenates them.
 
-        X = np.concatenate([overt, covert, rest], axis=0)
-        y = np.concatenate([overt_labels, covert_labels, rest_labels], axis=0)
+        Returns:
+            tuple: (X of shape (n_epochs, n_channels, n_times), y of shape (n_epochs,)).
+        """
+        data, labels = zip(*[
+            self._load_condition_data(label, cfg) for label, cfg in self._condition_configs()
+        ])
+        return np.concatenate(data, axis=0), np.concatenate(labels, axis=0)
 
-        # Reshape for oversampling: (samples, features)
-        n_samples, n_channels, n_timepoints = X.shape
-        X_reshaped = X.reshape(n_samples, -1)
+    def load_features(self):
+        """
+        Returns the session's epoch tensor and labels before balancing, from the feature
+        store when an up-to-date entry exists.
 
-        # Apply oversampling
-        ros = RandomOverSampler(random_state=42)
-        X_balanced, y_balanced = ros.fit_resample(X_reshaped, y)
+        Returns:
+            tuple: (X, y), memory-mapped when read from the feature store.
+        """
+        if self.feature_store is None:
+            return self._build_features()
+        return self.feature_store.get_or_compute(
+            self.subject_id, self.session_id, self._condition_configs(), self._build_features
+        )
 
-        # Reshape back to original shape
-        X_balanced = X_balanced.reshape(-1, n_channels, n_timepoints)
+    def load_data(self):
+        start = time.perf_counter()
+        X, y = self.load_features()
 
-        self.X = X_balanced[:,:200:]
-        self.X = self.normalizePerSamplePerChannel(self.X)
-        self.y = y_balanced
+        # Balancing happens on training indices (see trainWithSplit), so X is kept once
+        self.X = X[:,:200:] if self.streaming else self.normalizePerSamplePerChannel(X[:,:200:])
+        self.y = np.asarray(y)
+        self.telemetry["load_seconds"] = time.perf_counter() - start
 
-        print(f"Data loaded and oversampled: {self.X.shape[0]} samples, "
-              f"{self.X.shape[1]} channels, {self.X.shape[2]} timepoints")
+        counts = dict(zip(*np.unique(self.y, return_counts=True)))
+        print(f"Data loaded: {self.X.shape[0]} samples, "
+              f"{self.X.shape[1]} channels, {self.X.shape[2]} timepoints, class counts {counts}")
         
     def normalizePerSamplePerChannel(sself, X):
         """
         Normalize each (sample, channel) pair independently over timepoints.
         """
+        X = np.asarray(X, dtype=np.float32)
         mean = X.mean(axis=2, keepdims=True)  # shape: (N, channels, 1)
         std = X.std(axis=2, keepdims=True) + 1e-8
-        return (X - mean) / std
+        X = X - mean  # the only full copy of the data
+        X /= std
+        return X
 
     def train(self, test_split=0.2):
-        input_shape = (self.X.shape[1], self.X.shape[2])
-        self.model = OvertCoverRestClassifier(inputShape=input_shape)
-        self.model.compileModel()
+        X = self.X
+        train_kwargs = {}
+        if self.backend == 'covariance':
+            self.model = CovarianceClassifier()
+        elif self.init_checkpoint is not None:
+            check_checkpoint_hyperparameters(self.init_checkpoint, self.hyperparameters)
+            X = crop_time_window(self.X, self.hyperparameters["time_window"])
+            self.model = build_classifier(X.shape[1:], self.hyperparameters)
+            print(f"Fine-tuning from {self.init_checkpoint}" + (" (frozen conv layers)" if self.freeze_conv else ""))
+            self.model.loadWeights(self.init_checkpoint)
+            self.model.freezeConvLayers(self.freeze_conv)
+            self.model.compileModel(learningRate=config.DECODER_FINE_TUNE["learning_rate"])
+            train_kwargs = {
+                "epochs": config.DECODER_FINE_TUNE["epochs"],
+                "patience": config.DECODER_FINE_TUNE["patience"],
+                "batchSize": self.hyperparameters["batch_size"]
+            }
+        else:
+            X = crop_time_window(self.X, self.hyperparameters["time_window"])
+            self.model = build_classifier(X.shape[1:], self.hyperparameters)
+            self.model.compileModel(learningRate=self.hyperparameters["learning_rate"])
+            train_kwargs = {"batchSize": self.hyperparameters["batch_size"]}
         self.model.summary()
-        self.accuracy, self.report, self.confusion_matrix = self.model.trainWithSplit(self.X, self.y, validationSplit=test_split)
+        epochTelemetry = EpochTelemetry()
+        if self.backend == 'cnn':
+            train_kwargs["callbacks"] = [epochTelemetry]
+        start = time.perf_counter()
+        if self.holdout is not None:
+            # After a sweep, report accuracy on the test samples the sweep never saw
+            self.accuracy, self.report, self.confusion_matrix = self.model.trainOnIndices(
+                X, self.y, *self.holdout, balance=self.balance, normalize=self.streaming, **train_kwargs
+            )
+        else:
+            self.accuracy, self.report, self.confusion_matrix = self.model.trainWithSplit(
+                X, self.y, validationSplit=test_split, balance=self.balance, normalize=self.streaming,
+                **train_kwargs
+            )
+        self._record_training_telemetry(X, time.perf_counter() - start, epochTelemetry)
         print("Training completed.")
 
+    def _record_training_telemetry(self, X, train_seconds, epochTelemetry):
+        """
+        Cost of the trained decoder: training time and throughput (of the fit step alone,
+        without validation), the epoch it early-stopped at, its size and its single-batch
+        inference latency on the input path used in training.
+        """
+        n_samples = self.model.trainSamples
+        self.telemetry.update({
+            "backend": self.backend,
+            "evaluation": "holdout",
+            "accuracy": self.accuracy,
+            "n_train_samples": n_samples,
+            "train_seconds": train_seconds
+        })
+        if self.backend == 'cnn':
+            self.epoch_telemetry = epochTelemetry.epochs_frame(n_samples)
+            val_loss = self.epoch_telemetry["val_loss"]
+            self.telemetry.update({
+                "epochs_run": len(self.epoch_telemetry),
+                "best_epoch": int(self.epoch_telemetry.loc[val_loss.idxmin(), "epoch"]),
+                "time_to_early_stop_seconds": epochTelemetry.train_seconds,
+                "mean_epoch_seconds": self.epoch_telemetry["seconds"].mean(),
+                "samples_per_second": n_samples * len(self.epoch_telemetry) / self.epoch_telemetry["fit_seconds"].sum()
+            })
+        else:
+            self.epoch_telemetry = None
+            self.telemetry["samples_per_second"] = n_samples / self.model.fitSeconds
+        self.telemetry.update(model_size(self.model))
+        self.telemetry.update(inference_latency(self.model, X, normalize=self.streaming))
+        print(f"Training took {train_seconds:.1f} s ({self.telemetry['samples_per_second']:.0f} samples/s), "
+              f"inference latency p50 {self.telemetry['latency_p50_ms']:.2f} ms, "
+              f"p95 {self.telemetry['latency_p95_ms']:.2f} ms")
+
+    def save_telemetry(self):
+        prefix = f"sub-{self.subject_id}_ses-{self.session_id}_overt_covert_rest"
+        telemetry_path = Path(self.output_dir, f"{prefix}_telemetry.csv")
+        pd.DataFrame([{
+            "subject_id": self.subject_id, "session_id": self.session_id, **self.telemetry
+        }]).to_csv(telemetry_path, index=False)
+        if self.epoch_telemetry is not None:
+            self.epoch_telemetry.to_csv(Path(self.output_dir, f"{prefix}_telemetry_epochs.csv"), index=False)
+        print(f"Telemetry saved to {telemetry_path}")
+
+
+    def cross_validate(self, n_splits=None, n_repeats=None, max_workers=None):
+        """
+        Stratified (repeated) K-fold cross-validation with folds trained in parallel processes.
+
+        Args:
+            n_splits (int or None): Number of folds. Defaults to config.CV_FOLDS.
+            n_repeats (int or None): Number of repetitions. Defaults to config.CV_REPEATS.
+            max_workers (int or None): Number of concurrent folds. Defaults to config.MAX_WORKERS.
+
+        Returns:
+            dict: Fold metrics, summary and confusion matrices (see cross_validate).
+        """
+        self.cv_results = cross_validate(
+            self.X, self.y, n_splits=n_splits, n_repeats=n_repeats, max_workers=max_workers,
+            backend=self.backend, hyperparameters=self.hyperparameters, balance=self.balance,
+            normalize=self.streaming
+        )
+        summary = self.cv_results["summary"].set_index("metric")
+        print(f"Cross-validated accuracy: {summary.loc['accuracy', 'mean']:.4f} "
+              f"± {summary.loc['accuracy', 'std']:.4f}")
+        self.telemetry.update({
+            "backend": self.backend,
+            "evaluation": "cv",
+            "accuracy": summary.loc["accuracy", "mean"],
+            "cv_folds": int(summary.loc["accuracy", "n_folds"]),
+            "cv_wall_seconds": summary.loc["accuracy", "wall_seconds"],
+            "mean_fold_seconds": summary.loc["fit_seconds", "mean"],
+            "n_train_samples": self.cv_results["folds"]["n_train"].mean()
+        })
+        return self.cv_results
+
+    def save_cv_results(self):
+        prefix = f"sub-{self.subject_id}_ses-{self.session_id}_overt_covert_rest_cv"
+
+        folds_path = Path(self.output_dir, f"{prefix}_folds.csv")
+        self.cv_results["folds"].to_csv(folds_path, index=False)
+        print(f"Fold metrics and timings saved to {folds_path}")
+
+        summary_path = Path(self.output_dir, f"{prefix}_summary.csv")
+        self.cv_results["summary"].to_csv(summary_path, index=False)
+        print(f"Cross-validation summary saved to {summary_path}")
+
+        fold_cms = pd.concat([
+            pd.DataFrame(cm).rename_axis("true_label").reset_index().assign(repeat=repeat, fold=fold)
+            for (repeat, fold), cm in self.cv_results["confusion_matrices"].items()
+        ], ignore_index=True)
+        fold_cm_path = Path(self.output_dir, f"{prefix}_fold_confusion_matrices.csv")
+        fold_cms.to_csv(fold_cm_path, index=False)
+
+        cm_path = Path(self.output_dir, f"{prefix}_confusion_matrix.csv")
+        pd.DataFrame(self.cv_results["confusion_matrix"]).to_csv(cm_path, index=False)
+        print(f"Confusion matrices saved to {fold_cm_path} and {cm_path}")
+
+        self.save_telemetry()
+
+    def sweep(self, space=None, n_trials=None, max_workers=None):
+        """
+        Parallel hyperparameter sweep of the CNN on this session (see run_sweep). Finished
+        trials are cached per session, so an interrupted sweep resumes. The sweep's test split
+        is kept in self.holdout, so train() then reports accuracy on samples it never saw.
+
+        Args:
+            space (dict or None): Values to try per hyperparameter. Defaults to config.DECODER_SWEEP_SPACE.
+            n_trials (int or None): Sampled trials, or None for the full grid. Defaults to config.DECODER_SWEEP_TRIALS.
+            max_workers (int or None): Number of concurrent trials. Defaults to config.MAX_WORKERS.
+
+        Returns:
+            pd.DataFrame: One row per trial, best first.
+        """
+        prefix = f"sub-{self.subject_id}_ses-{self.session_id}_overt_covert_rest"
+        data_key = prefix
+        if self.feature_store is not None:
+            data_key = feature_key(self.subject_id, self.session_id, self._condition_configs())
+        self.holdout = holdout_split(self.y)
+        self.sweep_results = run_sweep(
+            self.X, self.y, space=space, n_trials=n_trials, cache_dir=Path(self.output_dir, 'sweeps', prefix),
+            data_key=data_key, max_workers=max_workers, balance=self.balance, normalize=self.streaming
+        )
+        best = self.sweep_results.iloc[0]
+        print(f"Best sweep trial: accuracy {best['accuracy']:.4f} with {best_hyperparameters(self.sweep_results)}")
+        return self.sweep_results
+
+    def save_sweep_results(self):
+        filename = f"sub-{self.subject_id}_ses-{self.session_id}_overt_covert_rest_sweep.csv"
+        filepath = Path(self.output_dir, filename)
+        self.sweep_results.to_csv(filepath, index=False)
+        print(f"Sweep results saved to {filepath}")
+
+    def export(self, quantization=None, fmt='tflite'):
+        """
+        Exports the trained model next to its weights for inference with OvertCovertRestPredictor.
+
+        Args:
+            quantization (str or None): None, 'float16' or 'int8' (TFLite only).
+            fmt (str): 'tflite' or 'savedmodel'.
+
+        Returns:
+            Path: The exported model.
+        """
+        if self.backend != 'cnn':
+            raise ValueError("Only the 'cnn' backend can be exported.")
+        # The exported graph normalizes raw epochs itself, so calibrate int8 on raw epochs
+        # (self.X is already normalized unless streaming)
+        raw_X = self.X if self.streaming else self.load_features()[0][:,:200:]
+        time_window = self.hyperparameters["time_window"]
+        return export_classifier(
+            self.model, export_path(self.checkpoint_path, quantization, fmt), quantization=quantization,
+            representative_data=crop_time_window(raw_X, time_window), time_window=time_window
+        )
 
     def save_results(self):
         
@@ -108,10 +358,31 @@ class OvertCovertRestPipeline:
         cm_df.to_csv(cm_path, index=False)
         print(f"Confusion matrix saved to {cm_path}")
 
-    def run(self):
+        self.model.saveWeights(self.checkpoint_path)
+        if self.backend == 'cnn':
+            save_hyperparameters(self.checkpoint_path, self.hyperparameters)
+        print(f"Model weights saved to {self.checkpoint_path}")
+
+        self.telemetry["checkpoint_bytes"] = self.checkpoint_path.stat().st_size
+        self.save_telemetry()
+
+    def run(self, cross_validation=False, sweep=False):
+        """
+        Args:
+            cross_validation (bool): Cross-validate instead of training a single model.
+            sweep (bool): Run the hyperparameter sweep first and continue with its best trial.
+        """
         if not config.OVERT_COVERT_REST_CLASSIFICATION:
             print("Pipeline not enabled in config.")
             return
         self.load_data()
+        if sweep:
+            self.sweep()
+            self.save_sweep_results()
+            self.hyperparameters = resolve_hyperparameters(best_hyperparameters(self.sweep_results))
+        if cross_validation:
+            self.cross_validate()
+            self.save_cv_results()
+            return
         self.train()
         self.save_results()
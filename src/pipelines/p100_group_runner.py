@@ -0,0 +1,134 @@
+import json
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+from src.pipelines.p100_pipeline import P100AnalysisPipeline
+from src.utils.parallel import run_per_session, report_errors
+from src.utils.graphics import styled_print
+import config as config
+
+
+def _processed_file(sub_id, ses_id):
+    return Path(config.BIDS_DIR) / "derivatives" / "processed_eeg" / f"sub-{sub_id}_ses-{ses_id}_processed-raw.fif"
+
+
+class _SessionTask:
+    """Picklable worker running P100AnalysisPipeline for one session in a process."""
+    def __init__(self, pipeline_kwargs, run_kwargs):
+        self.pipeline_kwargs = pipeline_kwargs
+        self.run_kwargs = run_kwargs
+
+    def __call__(self, key, _):
+        sub_id, ses_id = key
+        pipeline = P100AnalysisPipeline(
+            subject_id=sub_id, session_id=ses_id, **self.pipeline_kwargs
+        )
+        pipeline.run(save_csv=False, **self.run_kwargs)
+        return pipeline.results_frame()
+
+
+class P100GroupRunner:
+    """
+    Runs P100AnalysisPipeline for many sessions in a worker pool, skipping sessions whose
+    processed derivative and analysis configuration are unchanged since the last run, and
+    writing one consolidated results table.
+    """
+    def __init__(
+        self,
+        sessions: list,
+        condition1_config: dict,
+        condition2_config: dict,
+        channels: list[str],
+        output_dir: str = "p100_results",
+        max_workers: int = None,
+        **run_kwargs
+    ) -> None:
+        """
+        Args:
+            sessions (list): (subject_id, session_id) pairs.
+            condition1_config (dict): Trial and epoch params for condition 1.
+            condition2_config (dict): Trial and epoch params for condition 2.
+            channels (list[str]): EEG channels to analyze.
+            output_dir (str): Directory of the consolidated table and run manifest.
+            max_workers (int or None): Number of worker processes. Defaults to config.MAX_WORKERS.
+            **run_kwargs: Forwarded to P100AnalysisPipeline.run (e.g. single_trial=True).
+        """
+        self.sessions = [tuple(session) for session in sessions]
+        self.pipeline_kwargs = {
+            "condition1_config": condition1_config,
+            "condition2_config": condition2_config,
+            "channels": channels
+        }
+        self.run_kwargs = run_kwargs
+        self.max_workers = max_workers
+        self.output_dir = Path(output_dir)
+        name1 = condition1_config['label']
+        name2 = condition2_config['label']
+        self.results_path = self.output_dir / f"p100_group_{name1}_{name2}.csv"
+        self.manifest_path = self.output_dir / f".p100_group_{name1}_{name2}_manifest.json"
+        self.errors = {}
+
+    def _fingerprint(self, sub_id, ses_id) -> str:
+        """
+        Hash of the session's processed derivative (size and mtime) and the analysis configuration.
+        """
+        processed = _processed_file(sub_id, ses_id)
+        stat = processed.stat() if processed.exists() else None
+        payload = {
+            "session": [sub_id, ses_id],
+            "input": [stat.st_size, stat.st_mtime_ns] if stat else None,
+            "pipeline": self.pipeline_kwargs,
+            "run": self.run_kwargs
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _load_state(self):
+        manifest = json.loads(self.manifest_path.read_text()) if self.manifest_path.exists() else {}
+        previous = pd.read_csv(self.results_path, dtype={"subject_id": str, "session_id": str}) \
+            if self.results_path.exists() else pd.DataFrame(columns=["subject_id", "session_id"])
+        return manifest, previous
+
+    def run(self) -> pd.DataFrame:
+        """
+        Run all changed sessions and update the consolidated table.
+
+        Returns:
+            pd.DataFrame: Results of all successfully analyzed sessions.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest, previous = self._load_state()
+        done = set(zip(previous["subject_id"], previous["session_id"]))
+
+        pending = [
+            session for session in self.sessions
+            if manifest.get("_".join(session)) != self._fingerprint(*session) or session not in done
+        ]
+        styled_print('', f'P100 group run: {len(pending)} of {len(self.sessions)} sessions to analyze', color='green')
+
+        task = _SessionTask(self.pipeline_kwargs, self.run_kwargs)
+        results, self.errors = run_per_session(
+            task, [(session, None) for session in pending],
+            max_workers=self.max_workers, backend='process'
+        )
+        report_errors(self.errors, action='Failed')
+
+        rerun = set(pending)
+        kept = previous[[
+            (sub, ses) not in rerun and (sub, ses) in self.sessions
+            for sub, ses in zip(previous["subject_id"], previous["session_id"])
+        ]]
+        combined = pd.concat([kept] + list(results.values()), ignore_index=True)
+        combined = combined.sort_values(["subject_id", "session_id"], kind="stable").reset_index(drop=True)
+        combined.to_csv(self.results_path, index=False)
+
+        for session in pending:
+            key = "_".join(session)
+            if session in results:
+                manifest[key] = self._fingerprint(*session)
+            else:
+                manifest.pop(key, None)
+        self.manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+        styled_print('', f'Results saved to {self.results_path}', color='green')
+        return combined
@@ -2,9 +2,14 @@ import os
 import pandas as pd
 from mne.epochs import Epochs
 
+import config as config
 from src.dataset.data_reader import BIDSDatasetReader
 from src.dataset.eeg_epoch_builder import EEGEpochBuilder
 from src.analysis.p_100_analyser import P100ComponentAnalyzer
+from src.analysis.streaming_evoked import StreamingEvoked, stream_evoked
+from src.analysis.p100_batch import evoked_cache_path
+from src.analysis.single_trial import SingleTrialFeatureExtractor
+from src.analysis.statistics import contrast_statistics
 from src.visualizations.p100_plotter import P100Plotter
 
 
@@ -19,7 +24,9 @@ class P100AnalysisPipeline:
         session_id: str,
         condition1_config: dict,
         condition2_config: dict,
-        channels: list[str]
+        channels: list[str],
+        streaming: bool = False,
+        selective_loading: bool = True
     ) -> None:
         """
         Initialize the pipeline with subject/session info and condition configurations.
@@ -30,6 +37,10 @@ class P100AnalysisPipeline:
             condition1_config (dict): Dict with trial and epoch params for condition 1.
             condition2_config (dict): Same as condition1_config, with optional 'time_window'.
             channels (list[str], optional): EEG channels to analyze. Defaults to ['PO3', 'POz', 'PO4'].
+            streaming (bool): If True, evoked responses are accumulated batch by batch
+                instead of building preloaded Epochs.
+            selective_loading (bool): If True, only the analyzed channels and the time span
+                covered by the conditions' events are read from the processed derivative.
         """
         self.subject_id = subject_id
         self.session_id = session_id
@@ -41,6 +52,11 @@ class P100AnalysisPipeline:
         self.eeg = None
         self.epochs1: Epochs = None
         self.epochs2: Epochs = None
+        self.streaming = streaming
+        self.selective_loading = selective_loading
+        self.stream1: StreamingEvoked = None
+        self.stream2: StreamingEvoked = None
+        self.statistics: pd.DataFrame = None
 
     def load_data(self) -> 'P100AnalysisPipeline':
         """
@@ -49,33 +65,62 @@ class P100AnalysisPipeline:
         Returns:
             P100AnalysisPipeline: self
         """
+        selection = self._selection_kwargs() if self.selective_loading else {}
         self.bids_reader = BIDSDatasetReader(
             sub_id=self.subject_id,
-            ses_id=self.session_id
+            ses_id=self.session_id,
+            **selection
         )
         self.eeg = self.bids_reader.processed_file
         return self
 
+    def _selection_kwargs(self) -> dict:
+        """
+        Build the BIDSDatasetReader options restricting loading to the analyzed
+        channels and to the span of the conditions' events.
+
+        Returns:
+            dict: channels, event_criteria and margin keyword arguments.
+        """
+        configs = [self.condition1_config, self.condition2_config]
+        event_criteria = [
+            [cfg["trial_mode"], cfg["trial_unit"], cfg["experiment_mode"],
+             cfg["trial_boundary"], cfg["trial_type"], cfg["modality"]]
+            for cfg in configs
+        ]
+        margin = max(max(abs(cfg["tmin"]), abs(cfg["tmax"])) for cfg in configs)
+        return {
+            "channels": self.channels,
+            "event_criteria": event_criteria,
+            "margin": margin + config.SELECTIVE_LOAD_MARGIN
+        }
+
     def build_epochs(self) -> 'P100AnalysisPipeline':
         """
-        Construct MNE Epochs objects for both conditions.
+        Construct MNE Epochs objects for both conditions, or, in streaming
+        mode, accumulate their evoked responses without keeping the epochs.
 
         Returns:
             P100AnalysisPipeline: self
         """
+        if self.streaming:
+            self.stream1 = self._stream_evoked(self.condition1_config)
+            self.stream2 = self._stream_evoked(self.condition2_config)
+            return self
+
         self.epochs1 = self._create_epochs(self.condition1_config)
         self.epochs2 = self._create_epochs(self.condition2_config)
         return self
 
-    def _create_epochs(self, config: dict) -> Epochs:
+    def _epoch_builder(self, config: dict) -> EEGEpochBuilder:
         """
-        Helper to create epochs using EEGEpochBuilder.
+        Helper to set up an EEGEpochBuilder for a condition.
 
         Args:
             config (dict): Configuration dictionary for the condition.
 
         Returns:
-            Epochs: MNE Epochs object
+            EEGEpochBuilder: Builder filtering events by the condition criteria.
         """
         return EEGEpochBuilder(
             eeg_data=self.eeg,
@@ -85,11 +130,43 @@ class P100AnalysisPipeline:
             trial_boundary=config["trial_boundary"],
             trial_type=config["trial_type"],
             modality=config["modality"]
-        ).create_epochs(
+        )
+
+    def _create_epochs(self, config: dict) -> Epochs:
+        """
+        Helper to create epochs using EEGEpochBuilder.
+
+        Args:
+            config (dict): Configuration dictionary for the condition.
+
+        Returns:
+            Epochs: MNE Epochs object
+        """
+        return self._epoch_builder(config).create_epochs(
             tmin=config["tmin"],
             tmax=config["tmax"]
         )
 
+    def _stream_evoked(self, config: dict) -> StreamingEvoked:
+        """
+        Helper to accumulate the evoked response of a condition over the analyzed channels.
+
+        Args:
+            config (dict): Configuration dictionary for the condition.
+
+        Returns:
+            StreamingEvoked: Running mean, SEM and trial count.
+        """
+        picks = [ch for ch in self.channels if ch in self.eeg.ch_names]
+        if not picks:
+            raise ValueError("None of the selected channels are present in the EEG data.")
+        return stream_evoked(
+            self._epoch_builder(config),
+            tmin=config["tmin"],
+            tmax=config["tmax"],
+            picks=picks
+        )
+
     def analyze(self) -> 'P100AnalysisPipeline':
         """
         Compute P100 peak, latency, and mean amplitude for both conditions.
@@ -97,13 +174,17 @@ class P100AnalysisPipeline:
         Returns:
             P100AnalysisPipeline: self
         """
+        evoked1 = self.stream1.to_evoked(self.eeg.info) if self.streaming else None
+        evoked2 = self.stream2.to_evoked(self.eeg.info) if self.streaming else None
+
         self.analyzer1 = P100ComponentAnalyzer(
-            self.epochs1, channels=self.channels
+            self.epochs1, channels=self.channels, evoked=evoked1
         )
         self.analyzer2 = P100ComponentAnalyzer(
             self.epochs2,
             channels=self.channels,
-            time_window=self.condition2_config.get("time_window")
+            time_window=self.condition2_config.get("time_window"),
+            evoked=evoked2
         )
 
         lat1, peak1, mean1 = self.analyzer1.get_p100_peak()
@@ -116,10 +197,14 @@ class P100AnalysisPipeline:
 
         return self
 
-    def plot(self) -> 'P100AnalysisPipeline':
+    def plot(self, renderer=None) -> 'P100AnalysisPipeline':
         """
         Generate and display ERP plots for the two conditions.
 
+        Args:
+            renderer (FigureRenderService or None): Background render service; if None the
+                figure is rendered before returning.
+
         Returns:
             P100AnalysisPipeline: self
         """
@@ -131,7 +216,7 @@ class P100AnalysisPipeline:
             sub_id=self.subject_id,
             ses_id=self.session_id
         )
-        plotter.plot_evokeds()
+        plotter.plot_evokeds(renderer=renderer)
         return self
 
     def save_results(self, output_dir: str = "p100_results") -> 'P100AnalysisPipeline':
@@ -146,6 +231,24 @@ class P100AnalysisPipeline:
         """
         os.makedirs(output_dir, exist_ok=True)
 
+        df = self.results_frame()
+        name1=self.condition1_config['label']
+        name2=self.condition2_config['label']
+        csv_path = os.path.join(
+            output_dir,
+            f"sub-{self.subject_id}_ses-{self.session_id}_p100_{name1}_{name2}.csv"
+        )
+        df.to_csv(csv_path, index=False)
+        print(f"Results saved to {csv_path}")
+        return self
+
+    def results_frame(self) -> pd.DataFrame:
+        """
+        Collect the P100 peak metrics of both conditions.
+
+        Returns:
+            pd.DataFrame: One row per condition with latency, peak and mean.
+        """
         results = {
             "subject_id": self.subject_id,
             "session_id": self.session_id,
@@ -166,28 +269,111 @@ class P100AnalysisPipeline:
                 self.analyzer2.mean_amplitude
             ]
         }
-        name1=self.condition1_config['label']
-        name2=self.condition2_config['label']
-        df = pd.DataFrame(results)
-        csv_path = os.path.join(
-            output_dir,
-            f"sub-{self.subject_id}_ses-{self.session_id}_p100_{name1}_{name2}.csv"
+        return pd.DataFrame(results)
+
+    def save_evokeds(self, output_dir: str = None) -> 'P100AnalysisPipeline':
+        """
+        Cache both conditions' evoked responses for cohort-level analysis with P100BatchEngine.
+
+        Args:
+            output_dir (str or None): Cache directory. Defaults to derivatives/evoked.
+
+        Returns:
+            P100AnalysisPipeline: self
+        """
+        for analyzer, cfg in [(self.analyzer1, self.condition1_config),
+                              (self.analyzer2, self.condition2_config)]:
+            filepath = evoked_cache_path(
+                self.subject_id, self.session_id, cfg["label"], directory=output_dir
+            )
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            analyzer.get_evoked().save(filepath, overwrite=True, verbose=False)
+        return self
+
+    def single_trial_features(self) -> pd.DataFrame:
+        """
+        Extract trial-level P100 features for both conditions.
+
+        Returns:
+            pd.DataFrame: Features of every epoch of both conditions.
+        """
+        if self.streaming:
+            raise ValueError("Single-trial features require epochs; disable streaming.")
+
+        frames = []
+        for epochs, cfg in [(self.epochs1, self.condition1_config),
+                            (self.epochs2, self.condition2_config)]:
+            extractor = SingleTrialFeatureExtractor(
+                channel_groups={"_".join(self.channels): self.channels},
+                windows={"P100": cfg.get("time_window") or (0.08, 0.12)}
+            )
+            frames.append(extractor.extract(epochs, self.subject_id, self.session_id, cfg["label"]))
+        return pd.concat(frames, ignore_index=True)
+
+    def save_single_trial_features(self, output_dir: str = None) -> 'P100AnalysisPipeline':
+        """
+        Write trial-level P100 features for both conditions to the Parquet store.
+
+        Args:
+            output_dir (str or None): Store directory. Defaults to derivatives/single_trial.
+
+        Returns:
+            P100AnalysisPipeline: self
+        """
+        features = self.single_trial_features()
+        for label, df in features.groupby("condition", sort=False):
+            SingleTrialFeatureExtractor.save(
+                df, self.subject_id, self.session_id, label, output_dir=output_dir
+            )
+        return self
+
+    def test_contrast(self, metric: str = "mean", n_permutations: int = 5000) -> 'P100AnalysisPipeline':
+        """
+        Permutation p-value and bootstrap CI of the condition 1 vs condition 2 P100 contrast.
+
+        Args:
+            metric (str): Trial-level feature to compare ('mean', 'peak' or 'latency').
+            n_permutations (int): Number of permutations and bootstrap resamples.
+
+        Returns:
+            P100AnalysisPipeline: self
+        """
+        name1 = self.condition1_config['label']
+        name2 = self.condition2_config['label']
+        self.statistics = contrast_statistics(
+            self.single_trial_features(), name1, name2, metric=metric,
+            n_permutations=n_permutations, n_bootstrap=n_permutations
         )
-        df.to_csv(csv_path, index=False)
-        print(f"Results saved to {csv_path}")
+        session = self.statistics.iloc[0]
+        print(f"{name1} - {name2} P100 {metric}: diff={session['difference']:.2f}, "
+              f"p={session['p_value']:.4f}, "
+              f"CI=[{session['ci_low']:.2f}, {session['ci_high']:.2f}]")
         return self
 
-    def run(self, save_csv: bool = True) -> 'P100AnalysisPipeline':
+    def run(
+        self, save_csv: bool = True, cache_evoked: bool = True,
+        single_trial: bool = False, statistics: bool = False, renderer=None
+    ) -> 'P100AnalysisPipeline':
         """
         Execute the entire pipeline from loading to analysis and plotting.
 
         Args:
             save_csv (bool): Whether to save the output as a CSV. Defaults to True.
+            cache_evoked (bool): Whether to cache the evoked responses. Defaults to True.
+            single_trial (bool): Whether to store trial-level features. Defaults to False.
+            statistics (bool): Whether to test the condition contrast. Defaults to False.
+            renderer (FigureRenderService or None): Background render service for the figure.
 
         Returns:
             P100AnalysisPipeline: self
         """
-        self.load_data().build_epochs().analyze().plot()
+        self.load_data().build_epochs().analyze().plot(renderer=renderer)
+        if cache_evoked:
+            self.save_evokeds()
+        if single_trial:
+            self.save_single_trial_features()
+        if statistics:
+            self.test_contrast()
         if save_csv:
             self.save_results()
         return self
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from src.utils.graphics import styled_print
+import config as config
+
+
+def run_per_session(func, items, max_workers=None, backend='thread', initializer=None, initargs=(), mp_context=None):
+    """
+    Runs `func(key, value)` for every session concurrently with a bounded worker count.
+
+    Args:
+        func (callable): Function called as func(key, value). Must be picklable for the 'process' backend.
+        items (dict or list): Mapping (or list of (key, value) pairs) keyed by (sub_id, ses_id).
+        max_workers (int or None): Upper bound on concurrent workers. Defaults to config.MAX_WORKERS.
+        backend (str): 'thread' or 'process'.
+        initializer (callable or None): Called as initializer(*initargs) in every worker, e.g. to limit
+            threads. With the 'process' backend it always runs in a worker process, even for a single worker.
+        initargs (tuple): Arguments of `initializer`.
+        mp_context (multiprocessing context or None): Start method context of the 'process' backend.
+
+    Returns:
+        tuple: (results, errors) dicts keyed like `items`, in the order of `items`.
+    """
+    items = list(items.items()) if isinstance(items, dict) else list(items)
+    max_workers = config.MAX_WORKERS if max_workers is None else max_workers
+    max_workers = max(1, min(max_workers, len(items) or 1))
+
+    executor_kwargs = {"initializer": initializer, "initargs": initargs}
+    if backend == 'thread':
+        executor_cls = ThreadPoolExecutor
+    elif backend == 'process':
+        executor_cls = ProcessPoolExecutor
+        executor_kwargs["mp_context"] = mp_context
+    else:
+        raise ValueError("Invalid backend. Choose from 'thread' or 'process'.")
+
+    results, errors = {}, {}
+    # Runs inline with a single worker, unless a process initializer (e.g. thread caps or
+    # core pinning) must apply to an isolated worker rather than to the calling process
+    if max_workers == 1 and (backend == 'thread' or initializer is None):
+        if initializer is not None:
+            initializer(*initargs)
+        for key, value in items:
+            try:
+                results[key] = func(key, value)
+            except Exception as e:
+                errors[key] = e
+    else:
+        with executor_cls(max_workers=max_workers, **executor_kwargs) as executor:
+            futures = {executor.submit(func, key, value): key for key, value in items}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    errors[key] = e
+
+    order = [key for key, _ in items]
+    results = {key: results[key] for key in order if key in results}
+    errors = {key: errors[key] for key in order if key in errors}
+    return results, errors
+
+
+def report_errors(errors, action='Skipping'):
+    """Prints one line per failed session, mirroring the serial try/except messages."""
+    for (sub_id, ses_id), e in errors.items():
+        styled_print('', f'{action} sub-{sub_id}, ses-{ses_id} due to error: {e}', color='yellow')
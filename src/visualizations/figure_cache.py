@@ -0,0 +1,108 @@
+import sys
+import json
+import types
+import hashlib
+import functools
+import numpy as np
+from pathlib import Path
+
+
+# Bump when rendering changes in a way the hashed sources do not show (e.g. matplotlib styles)
+FIGURE_CACHE_VERSION = 1
+
+
+def _code_fingerprint(code):
+    """
+    Stable digest of a code object's bytecode, constants and referenced names, recursing
+    into nested functions, so editing a draw function (colours, labels, layout) changes it.
+    """
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            digest.update(_code_fingerprint(const).encode())
+        else:
+            digest.update(repr(const).encode())
+    return digest.hexdigest()
+
+
+def _project_modules(module_name, found=None):
+    """
+    A module and, transitively, the project (src.*) modules it imports or takes functions from.
+    """
+    found = set() if found is None else found
+    module = sys.modules.get(module_name)
+    if module is None or module_name in found:
+        return found
+    found.add(module_name)
+    for value in vars(module).values():
+        name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+        if isinstance(name, str) and name.startswith("src."):
+            _project_modules(name, found)
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def _source_fingerprint(module_name):
+    """
+    Digest of the source files of a draw function's module and of the project modules it
+    uses, so editing a plotting helper in another module (e.g. group_plot.plot_traces) also
+    changes the hash of the figures drawn with it. Modules without a source file (e.g. a
+    notebook) are covered by the code fingerprint only.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(_project_modules(module_name)):
+        path = getattr(sys.modules[name], "__file__", None)
+        if path is not None:
+            digest.update(name.encode())
+            digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def figure_hash(draw, spec, arrays, dpi, figsize):
+    """
+    Content hash of a figure: the draw function (name, code and the sources of its module and
+    the project modules it uses), FIGURE_CACHE_VERSION, plot parameters and plotted arrays.
+
+    Args:
+        draw (callable): Draw function used to render the figure.
+        spec (dict): Plot parameters.
+        arrays (dict): Plotted NumPy arrays.
+        dpi (int): Output resolution.
+        figsize (tuple): Figure size in inches.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    header = {
+        "draw": f"{draw.__module__}.{draw.__qualname__}",
+        "code": _code_fingerprint(draw.__code__),
+        "source": _source_fingerprint(draw.__module__),
+        "version": FIGURE_CACHE_VERSION,
+        "spec": spec,
+        "dpi": dpi,
+        "figsize": list(figsize)
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _hash_path(filepath):
+    filepath = Path(filepath)
+    return filepath.with_name(f".{filepath.name}.sha256")
+
+
+def is_cached(filepath, content_hash):
+    """Returns True if `filepath` exists and was rendered from content with `content_hash`."""
+    hash_path = _hash_path(filepath)
+    return Path(filepath).exists() and hash_path.exists() and hash_path.read_text().strip() == content_hash
+
+
+def mark_cached(filepath, content_hash):
+    """Records the content hash of a freshly rendered figure next to it."""
+    _hash_path(filepath).write_text(content_hash)
@@ -0,0 +1,86 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+
+def minmax_decimate(times, traces, n_bins):
+    """
+    Shape-preserving decimation: keeps the minimum and maximum of every bin, in time order,
+    so peaks survive downsampling to the pixel width. All traces are decimated together.
+
+    Args:
+        times (np.ndarray): Time points, shape (n_times,).
+        traces (np.ndarray): Traces of shape (n_traces, n_times).
+        n_bins (int): Number of bins, typically the axis width in pixels.
+
+    Returns:
+        tuple: (times of shape (n_traces, n_points), values of shape (n_traces, n_points)).
+    """
+    times = np.asarray(times, dtype=float)
+    traces = np.atleast_2d(np.asarray(traces, dtype=float))
+    n_times = traces.shape[1]
+    if n_bins <= 0 or 2 * n_bins >= n_times:
+        return np.broadcast_to(times, traces.shape), traces
+
+    bin_size = n_times // n_bins
+    n_used = bin_size * n_bins
+    binned = traces[:, :n_used].reshape(len(traces), n_bins, bin_size)
+    arg_min = binned.argmin(axis=2)
+    arg_max = binned.argmax(axis=2)
+
+    first = np.minimum(arg_min, arg_max)
+    second = np.maximum(arg_min, arg_max)
+    offsets = np.arange(n_bins) * bin_size
+    idx = np.stack([first + offsets, second + offsets], axis=2).reshape(len(traces), -1)
+
+    if n_used < n_times:
+        tail = np.broadcast_to(np.arange(n_used, n_times), (len(traces), n_times - n_used))
+        idx = np.concatenate([idx, tail], axis=1)
+
+    return times[idx], np.take_along_axis(traces, idx, axis=1)
+
+
+def plot_traces(ax, times, traces, colors, alpha=1.0, linewidth=1.0, linestyles='solid', decimate=True):
+    """
+    Draws many traces on one axis as a single LineCollection, decimated to the axis pixel width.
+
+    Args:
+        ax (Axes): Target axis.
+        times (np.ndarray): Time points, shape (n_times,).
+        traces (np.ndarray): Traces of shape (n_traces, n_times).
+        colors (list or str): One color per trace, or one color for all.
+        alpha (float): Line transparency.
+        linewidth (float): Line width.
+        linestyles (str or list): Line style(s).
+        decimate (bool): Whether to apply min/max decimation.
+
+    Returns:
+        LineCollection: The added collection.
+    """
+    traces = np.atleast_2d(np.asarray(traces, dtype=float))
+    if decimate:
+        n_bins = int(ax.get_window_extent().width)
+        x, y = minmax_decimate(times, traces, n_bins)
+    else:
+        x, y = np.broadcast_to(times, traces.shape), traces
+
+    segments = np.stack([x, y], axis=-1)
+    collection = LineCollection(
+        segments, colors=colors, alpha=alpha, linewidths=linewidth, linestyles=linestyles
+    )
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+def legend_handles(colors, **kwargs):
+    """
+    Proxy legend entries, one per label, so legends stay fixed-size regardless of trace count.
+
+    Args:
+        colors (dict): Mapping label -> color.
+
+    Returns:
+        list: Line2D handles.
+    """
+    return [Line2D([], [], color=color, label=label, **kwargs) for label, color in colors.items()]
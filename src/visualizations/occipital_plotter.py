@@ -0,0 +1,44 @@
+import numpy as np
+
+from src.visualizations.group_plot import plot_traces, legend_handles
+
+
+def draw_occipital_grid(fig, spec, arrays):
+    """
+    Draws one panel per session with the pictorial and fixation occipital averages,
+    each panel's traces as one decimated LineCollection.
+    Used by VisualRestExtractor.plot_occipital_all_subjects, inline or in a FigureRenderService worker.
+
+    Args:
+        fig (Figure): Target figure.
+        spec (dict): 'rows', 'cols', 'n_panels' and per-session 'titles'.
+        arrays (dict): 'times', 'positions' (panel index per session), 'pict' and 'fix'
+            arrays of shape (n_sessions, n_times).
+    """
+    rows, cols = spec['rows'], spec['cols']
+    axes = fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False).flatten()
+    times = arrays['times']
+
+    for idx, title, mean_pict, mean_fix in zip(
+            arrays['positions'], spec['titles'], arrays['pict'], arrays['fix']):
+        ax = axes[idx]
+        plot_traces(ax, times, np.stack([mean_pict, mean_fix]), colors=['green', 'blue'])
+        ax.axvline(0, linestyle='--', color='cyan', label='Onset')
+        ax.axvline(0.1, linestyle='--', color='red', label='100ms')
+        ax.axvline(0.3, linestyle='--', color='black', label='300ms')
+
+        ax.set_title(title)
+        if idx % cols == 0:
+            ax.set_ylabel('Amplitude (µV)')
+        if idx >= (rows - 1) * cols:
+            ax.set_xlabel('Time (s)')
+
+    for ax in axes[spec['n_panels']:]:
+        ax.axis('off')
+
+    markers, _ = axes[0].get_legend_handles_labels()
+    axes[0].legend(
+        handles=legend_handles({'Pictorial': 'green', 'Fixation': 'blue'}) + markers,
+        loc='upper right'
+    )
+    fig.tight_layout()
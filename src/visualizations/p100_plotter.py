@@ -1,10 +1,10 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import os
 from pathlib import Path
 import seaborn as sns
 import config as config
 
+from src.visualizations.render_service import render_figure
+
 class P100Plotter:
     def __init__(self, 
             condition1: 'P100ComponentAnalyzer', condition2: 'P100ComponentAnalyzer', 
@@ -25,11 +25,15 @@ class P100Plotter:
         self.sub_id = sub_id
         self.ses_id = ses_id
 
-    def plot_evokeds(self):
+    def plot_evokeds(self, renderer=None):
         """
         Plot the average evoked responses across all selected channels for condition1 and condition2.
         Converts data to microvolts, includes channel names in legend, highlights 80–120 ms window,
         and adds a vertical line at 0 ms.
+
+        Args:
+            renderer (FigureRenderService or None): If given, the figure is rendered in the background
+                and a Future is returned; otherwise it is rendered off-screen before returning.
         """
         evoked_1 = self.condition1.get_evoked()
         evoked_2 = self.condition2.get_evoked()
@@ -60,39 +64,47 @@ class P100Plotter:
         ch_str_1 = ', '.join(ch_names_1)
         ch_str_2 = ', '.join(ch_names_2)
 
-        sns.set_style("whitegrid")
-        plt.figure(figsize=(10, 5))
+        spec = {
+            'label1': f'{self.name1} (mean) [{ch_str_1}]',
+            'label2': f'{self.name2} (mean) [{ch_str_2}]'
+        }
+        arrays = {'times': times, 'mean_1': mean_1, 'mean_2': mean_2}
 
-        # Highlight 80–120 ms window
-        plt.axvspan(0.080, 0.120, color='orange', alpha=0.3, label='80–120 ms window')
+        # Save figure
+        directory = Path(config.IMAGES_DIR, f'sub-{self.sub_id}', f'ses-{self.ses_id}')
+        plot_name = f'p_100_component_{self.name1}_{self.name2}_mean.png'
+        filepath = Path(directory, plot_name)
 
-        # Add vertical line at 0 ms
-        plt.axvline(0, color='black', linestyle='--', linewidth=1.2, label='Stimulus Onset')
+        if renderer is not None:
+            return renderer.submit(draw_p100_evokeds, spec, arrays, filepath, dpi=300, figsize=(10, 5))
+        return render_figure(draw_p100_evokeds, spec, arrays, filepath, dpi=300, figsize=(10, 5))
 
-        # Plot evoked responses
-        plt.plot(times, mean_1, label=f'{self.name1} (mean) [{ch_str_1}]', linestyle='-', linewidth=2.0)
-        plt.plot(times, mean_2, label=f'{self.name2} (mean) [{ch_str_2}]', linestyle='--', linewidth=2.0)
 
-        # Axis labels and aesthetics
-        plt.xlabel('Time (s)', fontsize=12)
-        plt.ylabel('Amplitude (µV)', fontsize=12)
-        plt.legend(loc='best', fontsize=9, frameon=True)
-        plt.grid(True, which='major', linestyle='--', alpha=0.6)
+def draw_p100_evokeds(fig, spec, arrays):
+    """
+    Draws the mean evoked responses of two conditions, highlighting the 80–120 ms window
+    and marking stimulus onset. Used by P100Plotter, inline or in a FigureRenderService worker.
+    """
+    with sns.axes_style("whitegrid"):
+        ax = fig.add_subplot(1, 1, 1)
 
-        ax = plt.gca()
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
+    # Highlight 80–120 ms window
+    ax.axvspan(0.080, 0.120, color='orange', alpha=0.3, label='80–120 ms window')
 
-        plt.tight_layout()
+    # Add vertical line at 0 ms
+    ax.axvline(0, color='black', linestyle='--', linewidth=1.2, label='Stimulus Onset')
 
-        # Save figure
-        directory = Path(config.IMAGES_DIR, f'sub-{self.sub_id}', f'ses-{self.ses_id}')
-        os.makedirs(directory, exist_ok=True)
-        plot_name = f'p_100_component_{self.name1}_{self.name2}_mean.png'
-        filepath = Path(directory, plot_name)
+    # Plot evoked responses
+    ax.plot(arrays['times'], arrays['mean_1'], label=spec['label1'], linestyle='-', linewidth=2.0)
+    ax.plot(arrays['times'], arrays['mean_2'], label=spec['label2'], linestyle='--', linewidth=2.0)
 
-        plt.savefig(filepath, dpi=300)
-        plt.close()
+    # Axis labels and aesthetics
+    ax.set_xlabel('Time (s)', fontsize=12)
+    ax.set_ylabel('Amplitude (µV)', fontsize=12)
+    ax.legend(loc='best', fontsize=9, frameon=True)
+    ax.grid(True, which='major', linestyle='--', alpha=0.6)
 
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
 
-    
\ No newline at end of file
+    fig.tight_layout()
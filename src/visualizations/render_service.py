@@ -0,0 +1,114 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from src.utils.graphics import styled_print
+from src.visualizations.figure_cache import figure_hash, is_cached, mark_cached
+import config as config
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def render_figure(draw, spec, arrays, filepath, dpi=300, figsize=(10, 5), use_cache=True):
+    """
+    Renders one figure off-screen with the Agg canvas, without touching pyplot's global state.
+    Rendering is skipped when the file already exists and was drawn from identical content.
+
+    Args:
+        draw (callable): Module-level function draw(fig, spec, arrays) adding the artists.
+        spec (dict): Plot parameters (labels, titles, styling).
+        arrays (dict): Precomputed NumPy arrays to plot.
+        filepath (str or Path): Output image path.
+        dpi (int): Output resolution.
+        figsize (tuple): Figure size in inches.
+        use_cache (bool): Whether to skip figures whose content hash is unchanged.
+
+    Returns:
+        Path: The written (or already up-to-date) file.
+    """
+    filepath = Path(filepath)
+    content_hash = figure_hash(draw, spec, arrays, dpi, figsize)
+    if use_cache and is_cached(filepath, content_hash):
+        return filepath
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    draw(fig, spec, arrays)
+
+    os.makedirs(filepath.parent, exist_ok=True)
+    fig.savefig(filepath, dpi=dpi)
+    mark_cached(filepath, content_hash)
+    return filepath
+
+
+class FigureRenderService:
+    """
+    Renders figures from plot specs and precomputed arrays in a background process pool,
+    so analysis code never waits on rasterization.
+
+    Usage:
+        with FigureRenderService() as renderer:
+            plotter.plot_evokeds(renderer=renderer)
+    """
+    def __init__(self, max_workers=None, use_cache=True):
+        """
+        Args:
+            max_workers (int or None): Number of render processes. Defaults to config.MAX_WORKERS.
+            use_cache (bool): Whether to skip figures whose content hash is unchanged.
+        """
+        max_workers = config.MAX_WORKERS if max_workers is None else max_workers
+        self.use_cache = use_cache
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+        self.futures = {}
+
+    def submit(self, draw, spec, arrays, filepath, dpi=300, figsize=(10, 5)):
+        """
+        Queues a figure for rendering and returns immediately. Unchanged figures are
+        resolved right away without being sent to a worker.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the written file path.
+        """
+        if self.use_cache and is_cached(filepath, figure_hash(draw, spec, arrays, dpi, figsize)):
+            future = Future()
+            future.set_result(Path(filepath))
+            return future
+
+        future = self.executor.submit(
+            render_figure, draw, spec, arrays, filepath, dpi, figsize, self.use_cache
+        )
+        self.futures[future] = Path(filepath)
+        return future
+
+    def wait(self):
+        """
+        Blocks until every queued figure is written, reporting failures.
+
+        Returns:
+            list: Paths of the successfully written figures.
+        """
+        done, _ = wait(list(self.futures))
+        written = []
+        for future in done:
+            try:
+                written.append(future.result())
+            except Exception as e:
+                styled_print('', f'Failed to render {self.futures[future]}: {e}', color='red')
+        self.futures = {}
+        return written
+
+    def close(self):
+        self.wait()
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
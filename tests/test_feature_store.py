@@ -0,0 +1,37 @@
+import pickle
+import numpy as np
+
+from src.decoding.feature_store import PooledFeatureArray
+
+
+def _pooled(tmp_path, channels=slice(None)):
+    rng = np.random.default_rng(0)
+    sessions = [rng.normal(size=(n, 8, 30)).astype(np.float32) for n in (5, 7)]
+    paths = []
+    for i, X in enumerate(sessions):
+        paths.append(tmp_path / f"{i}.npy")
+        np.save(paths[-1], X)
+    return PooledFeatureArray(paths, channels=channels), np.concatenate(sessions)[:, channels]
+
+
+def test_time_slice_stays_lazy(tmp_path):
+    X, expected = _pooled(tmp_path, channels=slice(None, 6))
+    # crop_time_window indexes like this
+    cropped = X[:, :, 4:20]
+    assert isinstance(cropped, PooledFeatureArray)
+    assert cropped.shape == (12, 6, 16)
+    np.testing.assert_array_equal(cropped[np.arange(12)], expected[:, :, 4:20])
+    np.testing.assert_array_equal(cropped[:, 1:5, ::2][[0, 6, 11]], expected[[0, 6, 11], 1:5, 4:20:2])
+
+
+def test_time_slice_survives_pickling(tmp_path):
+    X, expected = _pooled(tmp_path)
+    cropped = pickle.loads(pickle.dumps(X[:, :, 10:]))
+    np.testing.assert_array_equal(cropped[[1, 8]], expected[[1, 8], :, 10:])
+
+
+def test_sample_keys(tmp_path):
+    X, expected = _pooled(tmp_path)
+    np.testing.assert_array_equal(X[3], expected[3])
+    np.testing.assert_array_equal(X[2:9], expected[2:9])
+    np.testing.assert_array_equal(X[[1, 6], :, 3], expected[[1, 6], :, 3])